@@ -0,0 +1,313 @@
+"""Throughput benchmarks for gym-sailing.
+
+Measures the boat physics, the environments, the vectorized environments and
+the renderer, and writes the results to a JSON file that can be compared with
+an earlier run to catch regressions:
+
+    python benchmarks/run.py --output new.json --compare old.json
+"""
+
+import argparse
+import importlib.metadata
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import gymnasium as gym
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import gym_sailing  # noqa: E402
+from gym_sailing.envs.boat_env import physics_class  # noqa: E402
+from gym_sailing.physics.motorboat import MotorBoat  # noqa: E402
+from gym_sailing.physics.sailboat import SailBoat  # noqa: E402
+
+VECTOR_SIZES = [1, 16, 64, 256, 1024]
+FLEET_SIZES = [1, 10, 80]
+# import gym_sailing + gym.make("Sailboat-v0") in a fresh interpreter, gymnasium
+# being already imported
+IMPORT_BUDGET_MS = 50.0
+IMPORT_SCRIPT = """
+import sys, time
+import gymnasium as gym
+start = time.perf_counter()
+import gym_sailing
+env = gym.make("Sailboat-v0", physics_backend=sys.argv[1])
+print(time.perf_counter() - start, "pygame" in sys.modules)
+"""
+
+
+def measure(call, calls, items=1, memory_calls=None):
+    """Times calls to call() one by one, items is the number of steps or frames
+    produced by each call. Peak memory is the largest amount of memory traced
+    by tracemalloc during a shorter second run."""
+    call()  # warm up
+    latency = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter()
+        call()
+        latency[i] = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in range(memory_calls or max(1, calls // 10)):
+        call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return summary(latency, items, peak / 1024)
+
+
+def summary(latency, items, peak_memory_kb):
+    calls = len(latency)
+    return {
+        "per_sec": float(items * calls / latency.sum()),
+        "latency_us": {
+            "p50": float(np.percentile(latency, 50) * 1e6),
+            "p90": float(np.percentile(latency, 90) * 1e6),
+            "p99": float(np.percentile(latency, 99) * 1e6),
+            "max": float(latency.max() * 1e6),
+        },
+        "peak_memory_kb": peak_memory_kb,
+        "calls": calls,
+        "items_per_call": items,
+    }
+
+
+def bench_physics(scale, physics_backend):
+    results = {}
+    for boat_class in (SailBoat, MotorBoat):
+        boat = physics_class(boat_class, physics_backend)(x=25.0, y=5.0, heading=1.0)
+        rudder = itertools.cycle(np.random.default_rng(0).uniform(-1, 1, 997).tolist())
+        results[f"physics/{boat_class.__name__}.command"] = measure(
+            lambda: boat.command(next(rudder)), 20000 * scale
+        )
+    return results
+
+
+def bench_envs(scale, physics_backend):
+    results = {}
+    for env_id in ("Sailboat-v0", "Motorboat-v0"):
+        env = gym.make(env_id, physics_backend=physics_backend)
+        env.reset(seed=0)
+        action = np.array([0.3])
+
+        def step():
+            _, _, terminated, truncated, _ = env.step(action)
+            if terminated or truncated:
+                env.reset()
+
+        results[f"env/{env_id}.step"] = measure(step, 5000 * scale)
+        results[f"env/{env_id}.reset"] = measure(env.reset, 500 * scale)
+        env.close()
+    return results
+
+
+def bench_vector(scale, physics_backend):
+    results = {}
+    for num_envs in VECTOR_SIZES:
+        envs = gym.make_vec(
+            "Sailboat-v0",
+            num_envs,
+            vectorization_mode="vector_entry_point",
+            physics_backend=physics_backend,
+        )
+        envs.reset(seed=0)
+        actions = np.full((num_envs, 1), 0.3)
+        results[f"vector/Sailboat-v0/{num_envs}"] = measure(
+            lambda: envs.step(actions), max(20, 2000 * scale // num_envs), num_envs
+        )
+        envs.close()
+    return results
+
+
+def bench_pixels(scale, physics_backend):
+    results = {}
+    for num_envs in VECTOR_SIZES:
+        envs = gym.make_vec(
+            "Sailboat-v0",
+            num_envs,
+            vectorization_mode="vector_entry_point",
+            physics_backend=physics_backend,
+            obs_type="pixels",
+        )
+        envs.reset(seed=0)
+        actions = np.full((num_envs, 1), 0.3)
+        results[f"pixels/Sailboat-v0/{num_envs}"] = measure(
+            lambda: envs.step(actions), max(20, 500 * scale // num_envs), num_envs
+        )
+        envs.close()
+    return results
+
+
+def bench_renderer(scale, physics_backend):
+    from gym_sailing.utils.renderer import Renderer
+
+    env = gym_sailing.envs.BoatEnv
+    results = {}
+    for n_boats in FLEET_SIZES:
+        renderer = Renderer(
+            env.BOAT_LENGTH, env.BOAT_BEAM, env.TARGET_RAD, env.COURSE_SIZE
+        )
+        rng = np.random.default_rng(0)
+        boats = rng.uniform(5, env.COURSE_SIZE - 5, (n_boats, 2))
+        headings = rng.uniform(-np.pi, np.pi, n_boats)
+        frame = [0]
+
+        def render():
+            frame[0] += 1
+            boats[:] += 0.02
+            headings[:] += 0.01
+            renderer._render_frame(
+                boats=[
+                    (x, y, heading, 0.2)
+                    for (x, y), heading in zip(boats.tolist(), headings.tolist())
+                ],
+                target=env.TARGET,
+                stepnum=frame[0],
+                reward=0.0,
+                render_mode="rgb_array",
+                fps=env.metadata["render_fps"],
+            )
+
+        results[f"render/rgb_array/{n_boats}"] = measure(render, 100 * scale)
+        renderer.close()
+    return results
+
+
+def bench_import(scale, physics_backend):
+    """Times the import in new interpreters, checking that pygame is not loaded
+    until something is rendered."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    latency = np.empty(10 * scale)
+    for i in range(len(latency)):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT, physics_backend],
+            capture_output=True,
+            text=True,
+            check=True,
+            env=env,
+        ).stdout.split()
+        assert output[1] == "False", "pygame was imported by gym.make"
+        latency[i] = float(output[0])
+    return {"import/Sailboat-v0": summary(latency, 1, None)}
+
+
+SUITES = {
+    "import": bench_import,
+    "physics": bench_physics,
+    "env": bench_envs,
+    "vector": bench_vector,
+    "pixels": bench_pixels,
+    "render": bench_renderer,
+}
+
+
+def compare(results, baseline, tolerance):
+    """Returns the benchmarks whose throughput dropped more than tolerance."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["per_sec"] / baseline[name]["per_sec"]
+        print(f"{name:40} {ratio:6.2f}x")
+        if ratio < 1 - tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def package_version():
+    try:
+        return importlib.metadata.version("gym-sailing")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def max_rss_kb():
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 if sys.platform == "darwin" else rss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="benchmarks.json")
+    parser.add_argument("--suites", nargs="+", default=list(SUITES), choices=SUITES)
+    parser.add_argument(
+        "--scale", type=int, default=1, help="multiplies the number of calls"
+    )
+    parser.add_argument(
+        "--physics-backend", default="python", choices=["python", "jit"]
+    )
+    parser.add_argument("--compare", help="JSON file of an earlier run")
+    parser.add_argument(
+        "--import-budget-ms",
+        type=float,
+        default=IMPORT_BUDGET_MS,
+        help="median import time allowed by the import suite",
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed throughput drop"
+    )
+    args = parser.parse_args()
+
+    results = {}
+    for suite in args.suites:
+        for name, result in SUITES[suite](args.scale, args.physics_backend).items():
+            peak = result["peak_memory_kb"]
+            print(
+                f"{name:40} {result['per_sec']:12.1f}/s"
+                f"  p50 {result['latency_us']['p50']:9.1f}us"
+                f"  p99 {result['latency_us']['p99']:9.1f}us"
+                + (f"  peak {peak:9.1f}KiB" if peak is not None else "")
+            )
+            results[name] = result
+
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "version": package_version(),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "gymnasium": gym.__version__,
+                "platform": platform.platform(),
+                "processor": platform.processor(),
+                "physics_backend": args.physics_backend,
+                "max_rss_kb": max_rss_kb(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+
+    if "import/Sailboat-v0" in results:
+        median_ms = results["import/Sailboat-v0"]["latency_us"]["p50"] / 1e3
+        if median_ms > args.import_budget_ms:
+            print(
+                f"Import took {median_ms:.1f}ms, over the "
+                f"{args.import_budget_ms:.1f}ms budget"
+            )
+            sys.exit(1)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("Regressions:", ", ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,21 @@ from gymnasium.envs.registration import register
 
 register(
     id="Sailboat-v0",
-    entry_point="gym_sailing.envs:SailboatEnv",
+    entry_point="gym_sailing.envs.sailboat_env:SailboatEnv",
+    vector_entry_point="gym_sailing.envs.sailboat_env:SailboatVectorEnv",
     max_episode_steps=3000,
 )
 
 register(
     id="SailboatDiscrete-v0",
-    entry_point="gym_sailing.envs:SailboatDiscreteEnv",
+    entry_point="gym_sailing.envs.sailboat_env:SailboatDiscreteEnv",
+    vector_entry_point="gym_sailing.envs.sailboat_env:SailboatDiscreteVectorEnv",
     max_episode_steps=3000,
 )
 
 register(
     id="Motorboat-v0",
-    entry_point="gym_sailing.envs:MotorboatEnv",
+    entry_point="gym_sailing.envs.motorboat_env:MotorboatEnv",
+    vector_entry_point="gym_sailing.envs.motorboat_env:MotorboatVectorEnv",
     max_episode_steps=2000,
 )
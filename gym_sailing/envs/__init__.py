@@ -1,5 +1,37 @@
-from gym_sailing.envs.motorboat_env import MotorboatEnv
-from gym_sailing.envs.sailboat_env import SailboatEnv
-from gym_sailing.envs.sailboat_env import SailboatDiscreteEnv
-from gym_sailing.envs.boat_env import BoatEnv
-from gym_sailing.envs.boat_env import BoatDiscreteEnv
+"""The environments, each module is only imported when one of its classes is
+first used, so the registry entry points load no more than they need."""
+
+import importlib
+
+_MODULES = {
+    "MotorboatEnv": "motorboat_env",
+    "MotorboatVectorEnv": "motorboat_env",
+    "SailboatEnv": "sailboat_env",
+    "SailboatDiscreteEnv": "sailboat_env",
+    "SailboatVectorEnv": "sailboat_env",
+    "SailboatDiscreteVectorEnv": "sailboat_env",
+    "BoatEnv": "boat_env",
+    "BoatDiscreteEnv": "boat_env",
+    "BoatVectorEnv": "boat_env",
+    "BoatDiscreteVectorEnv": "boat_env",
+    "BoatFleetEnv": "fleet_env",
+    "SailboatFleetEnv": "fleet_env",
+    "MotorboatFleetEnv": "fleet_env",
+    "FleetParallelEnv": "fleet_env",
+    "SharedMemoryVectorEnv": "shared_memory_env",
+}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name):
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f"{__name__}.{_MODULES[name]}")
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return __all__
@@ -1,13 +1,22 @@
+import math
 from abc import abstractmethod
+from functools import partial
 
 import gymnasium as gym
 import numpy as np
 from gymnasium import spaces
+from gymnasium.vector import AutoresetMode, VectorEnv
+from gymnasium.vector.utils import batch_space
 
-from gym_sailing.utils.renderer import Renderer
+from gym_sailing.physics.boat import Boat
+from gym_sailing.utils.instrumentation import METHODS, Instrumentation
+from gym_sailing.utils.rasterizer import PixelObservations, Rasterizer
+
+OBS_TYPES = ["state", "pixels"]
 
 
 class BoatEnv(gym.Env):
+    BOAT_TYPE = "sailboat"  # the hull drawn by Renderer
     BOAT_BEAM = 1.4  # meters
     BOAT_LENGTH = 4.2  # meters
     TARGET_RAD = BOAT_LENGTH / 2
@@ -17,125 +26,333 @@ class BoatEnv(gym.Env):
 
     metadata = {"render_modes": ["human", "rgb_array", "ansi"], "render_fps": 60}
 
-    def __init__(self, render_mode=None):
+    def __init__(
+        self,
+        render_mode=None,
+        physics_backend="python",
+        render_quality="atlas",
+        render_incremental=None,
+        substeps=1,
+        time_step=Boat.TIME_STEP,
+        integrator="euler",
+        obs_buffer=None,
+        return_info=True,
+        wind=None,
+        local_wind=False,
+        instrument=False,
+        dtype=np.float64,
+        obs_type="state",
+        pixel_size=64,
+        grayscale=False,
+        frame_stack=1,
+    ):
         assert render_mode is None or render_mode in self.metadata["render_modes"]
+        assert substeps >= 1
+        assert obs_type in OBS_TYPES
         self.render_mode = render_mode
+        self.dtype = np.dtype(dtype)  # of the spaces and observations
+        self.wind = wind
+        self.local_wind = local_wind
+        self.obs_buffer = obs_buffer
+        self.return_info = return_info
+        self.physics_backend = check_physics_backend(physics_backend)
+        self.substeps = substeps
+        self.time_step = time_step
+        self.integrator = integrator
+        self.render_quality = render_quality
+        self.render_incremental = render_incremental
         self.renderer = None
+        self.boat = None
+        self.reset_key = None
+        self.episode = 0
 
-        self.low = np.array(
-            [
-                -10,
-                -np.pi,
-                -1,
-                -np.pi,
-                0,
-            ]
-        )
+        self.low, self.high = state_bounds(self.COURSE_SIZE, local_wind)
 
-        self.high = np.array(
-            [
-                10,
-                np.pi,
+        self.action_space = spaces.Box(low=-1.0, high=1.0, shape=(1,), dtype=dtype)
+        self.observation_space = spaces.Box(
+            self.low.astype(dtype), self.high.astype(dtype), dtype=dtype
+        )
+        self._state_buffer = obs_buffer  # of the state observation
+        self.pixels = None
+        if obs_type == "pixels":
+            self._state_buffer = np.empty(self.observation_space.shape, dtype)
+            self.pixels = PixelObservations(
+                make_rasterizer(self, pixel_size, grayscale),
                 1,
-                np.pi,
-                self.COURSE_SIZE * 2,
-            ]
+                frame_stack,
+                None if obs_buffer is None else obs_buffer[None],
+            )
+            self.observation_space = spaces.Box(
+                0, 255, self.pixels.shape[1:], dtype=np.uint8
+            )
+        assert obs_buffer is None or (
+            obs_buffer.shape == self.observation_space.shape
+            and obs_buffer.dtype == self.observation_space.dtype
         )
 
-        self.action_space = spaces.Box(low=-1.0, high=1.0, shape=(1,), dtype=np.float64)
-        self.observation_space = spaces.Box(self.low, self.high, dtype=np.float64)
+        # timings of the phases of a step, see Instrumentation
+        self.instrumentation = None
+        if instrument:
+            self.instrumentation = Instrumentation(self)
+            self.instrumentation.attach()
 
     def step(self, action):
         self.stepnum += 1
         action = np.clip(action, -1, 1)
         self.last_action = action[0]
-        self.boat.command(action[0])
+        self.boat.command(action[0], self.substeps)
+        if self.wind is not None and not self.wind.CONSTANT:
+            self._update_wind()
 
-        obs, distance2target = self._get_obs()
-        terminated, reward = self._get_reward(distance2target)
+        obs, distance, potential = self._get_obs()
+        terminated, reward = self._get_reward(distance, potential)
+        if self.pixels is not None:
+            obs = self._pixel_obs(restart=False)
 
         if self.render_mode == "human":
             self._render_frame()
 
-        return (
-            obs,
-            reward,
-            terminated,
-            False,
-            {
-                "distance2target": np.linalg.norm(distance2target),
-            },
-        )
+        info = {"distance2target": distance} if self.return_info else {}
+        return obs, reward, terminated, False, info
 
-    def _get_reward(self, distance2target):
+    def _get_reward(self, distance, potential):
         terminated = False
         reward = -0.1  # Alive penalty
 
-        if np.linalg.norm(distance2target) < self.TARGET_RAD:
+        if distance < self.TARGET_RAD:
             reward = 100
             terminated = True
 
-        if np.linalg.norm(distance2target) >= self.COURSE_SIZE:
+        if distance >= self.COURSE_SIZE:
             reward = -100
             terminated = True
 
-        # infinity norm previus distance to target- current distance to target
-        reward += 10 * (
-            np.linalg.norm(self.prev_distance2target, 8)
-            - np.linalg.norm(distance2target, 8)
-        )
+        # 8-norm previous distance to target - current distance to target
+        reward += 10 * (self.prev_potential - potential)
 
-        self.prev_distance2target = distance2target
+        self.prev_potential = potential
         self.last_reward = reward
         return terminated, reward
 
     def _get_obs(self):
-        distance2target = np.array([self.boat.x, self.boat.y]) - np.array(self.TARGET)
-        heading2target = np.arctan2(
-            self.TARGET[1] - self.boat.y, self.TARGET[0] - self.boat.x
+        """Returns the observation, the distance to the target and the shaping
+        potential, the 8-norm of the distance to the target."""
+        dx = self.boat.x - self.TARGET[0]
+        dy = self.boat.y - self.TARGET[1]
+        distance = math.sqrt(dx * dx + dy * dy)
+        potential = (abs(dx) ** 8 + abs(dy) ** 8) ** 0.125
+
+        obs = self._state_buffer
+        if obs is None:
+            obs = np.empty(self.observation_space.shape, self.dtype)
+        obs[0] = self.boat.speed
+        obs[1] = norm(self.boat.heading - np.pi / 2)
+        obs[2] = self.boat.heading_dot
+        obs[3] = norm(math.atan2(-dy, -dx) - np.pi / 2)
+        obs[4] = 2 * distance / self.COURSE_SIZE
+        if self.local_wind:
+            obs[5] = math.sqrt(self.boat.wind_x**2 + self.boat.wind_y**2)
+            obs[6] = norm(self.boat.wind_direction - np.pi / 2)
+
+        return obs, distance, potential
+
+    def _pixel_obs(self, restart):
+        """The pixel observation, a new stack of frames if restart."""
+        boat = self.boat
+        obs = self.pixels.observe(
+            [boat.x], [boat.y], [boat.heading], slice(None) if restart else None
         )
+        # the stack is kept for the next frames, only an obs_buffer is shared
+        return obs[0] if self.obs_buffer is not None else obs[0].copy()
 
-        obs = np.array(
-            [
-                self.boat.speed,
-                norm(self.boat.heading - np.pi / 2),
-                self.boat.heading_dot,
-                norm(heading2target - np.pi / 2),
-                2 * np.linalg.norm(distance2target) / self.COURSE_SIZE,
-            ]
-        )
-
-        return obs, distance2target
+    @abstractmethod
+    def _make_boat(self, x, y, heading, heading_dot, speed):
+        pass
 
     @abstractmethod
+    def _make_boats(self, n):
+        """Returns a BoatBatch of n boats like the one of _make_boat, for rollout."""
+
+    def _rudder(self, actions):
+        """Rudder positions of a batch of actions."""
+        return np.clip(np.asarray(actions, dtype=np.float64).reshape(-1), -1, 1)
+
     def reset(self, options=None, seed=None):
+        """Episodes are numbered from the last seeded reset, options={"episode": n}
+        starts episode n directly to replay it."""
         super().reset(seed=seed)
+        if seed is not None:
+            self.reset_key, self.episode = reset_key(seed), 0
+        elif self.reset_key is None:
+            self.reset_key = reset_key(self.np_random.integers(2**63))
+            self.episode = 0
+        else:
+            self.episode += 1
+        if options is not None and "episode" in options:
+            self.episode = options["episode"]
+
+        state = sample_initial_states(
+            self.COURSE_SIZE, [self.reset_key], [self.episode]
+        )
+        self.boat = self._make_boat(**{k: float(v[0]) for k, v in state.items()})
+        if self.wind is not None:
+            # the field of an episode is drawn from the episode's stream too
+            self.wind.reset(np.random.default_rng([*self.reset_key, self.episode]))
+
         self.stepnum = 0
         self.last_reward = 0
         self.last_action = 0
+        if self.wind is not None:
+            self._update_wind()
         if self.render_mode in ["human", "rgb_array"]:
-            self.renderer = Renderer(
-                self.BOAT_LENGTH, self.BOAT_BEAM, self.TARGET_RAD, self.COURSE_SIZE
-            )
-
-        self.prev_distance2target = np.array([self.boat.x, self.boat.y]) - np.array(
-            self.TARGET
-        )
+            if self.renderer is None:
+                # imports pygame, only loaded once something is rendered
+                from gym_sailing.utils.renderer import Renderer
+
+                self.renderer = Renderer(
+                    self.BOAT_LENGTH,
+                    self.BOAT_BEAM,
+                    self.TARGET_RAD,
+                    self.COURSE_SIZE,
+                    self.render_quality,
+                    incremental=self.render_incremental,
+                )
+            self.renderer.reset()
 
-        obs, _ = self._get_obs()
+        obs, _, self.prev_potential = self._get_obs()
+        if self.pixels is not None:
+            obs = self._pixel_obs(restart=True)
 
         return (obs, {})
 
+    def get_state(self):
+        """Returns the simulator state as a flat float64 array: the Boat.STATE,
+        the step number, the previous potential, the last reward and action,
+        the episode number and the key of the episode stream, as four 32-bit
+        words so it is stored exactly."""
+        return np.concatenate(
+            (
+                self.boat.get_state(),
+                [
+                    self.stepnum,
+                    self.prev_potential,
+                    self.last_reward,
+                    self.last_action,
+                    self.episode,
+                ],
+                self.reset_key.view(np.uint32),
+            )
+        )
+
+    def set_state(self, state):
+        """Restores a state from get_state and returns its observation. The
+        renderer is left as it is and a stack of pixel frames starts over."""
+        state = np.asarray(state, dtype=np.float64)
+        size = len(Boat.STATE)
+        if self.boat is None:
+            self.boat = self._make_boat(0.0, 0.0, 0.0, 0.0, 0.0)
+        self.boat.set_state(state[:size])
+        (
+            stepnum,
+            self.prev_potential,
+            self.last_reward,
+            self.last_action,
+            episode,
+        ) = state[size : size + 5].tolist()
+        self.stepnum = int(stepnum)
+        key = state[size + 5 :].astype(np.uint32).view(np.uint64)
+        if self.wind is not None and (
+            episode != self.episode or not np.array_equal(key, self.reset_key)
+        ):
+            self.wind.reset(np.random.default_rng([*key, int(episode)]))
+        self.reset_key, self.episode = key, int(episode)
+
+        obs, _, _ = self._get_obs()
+        if self.pixels is not None:
+            obs = self._pixel_obs(restart=True)
+        return obs
+
+    def rollout(self, states, action_sequences):
+        """Evaluates many branches at once, for planning.
+
+        Branch i starts from states[i], a get_state snapshot, and takes the
+        actions of action_sequences[i], with the boats of all the branches
+        stepped together in a BoatBatch. Returns the final states, the
+        (branches, steps) rewards and which branches terminated. A branch stops
+        when it terminates and gets no reward after that. Every branch feels
+        the wind field of the current episode.
+        """
+        states = np.array(states, dtype=np.float64)
+        action_sequences = np.asarray(action_sequences)
+        n, steps = action_sequences.shape[:2]
+        size = len(Boat.STATE)
+        boats = self._make_boats(n)
+        boats.set_state(slice(None), states[:, :size].T)
+        stepnum = states[:, size]
+        prev_potential = states[:, size + 1]
+        rewards = np.zeros((n, steps))
+        terminated = np.zeros(n, dtype=np.bool_)
+
+        for t in range(steps):
+            rudder = self._rudder(action_sequences[:, t])
+            running = ~terminated
+            frozen = boats.get_state(terminated)
+            boats.command(rudder, self.substeps)
+            boats.set_state(terminated, frozen)
+            stepnum += running
+            if self.wind is not None and not self.wind.CONSTANT:
+                wind = self.wind.sample(
+                    boats.x, boats.y, stepnum * (self.substeps * self.time_step)
+                )
+                boats.set_wind(slice(None), *wind)
+
+            dx = boats.x - self.TARGET[0]
+            dy = boats.y - self.TARGET[1]
+            distance = np.sqrt(dx * dx + dy * dy)
+            potential = (np.abs(dx) ** 8 + np.abs(dy) ** 8) ** 0.125
+            reached = distance < self.TARGET_RAD
+            off_course = distance >= self.COURSE_SIZE
+            reward = np.where(reached, 100.0, -0.1)
+            reward[off_course] = -100.0
+            reward += 10 * (prev_potential - potential)
+            reward[terminated] = 0.0
+
+            rewards[:, t] = reward
+            prev_potential[running] = potential[running]
+            states[running, size + 2] = reward[running]
+            states[running, size + 3] = rudder[running]
+            terminated |= reached | off_course
+
+        states[:, :size] = boats.get_state().T
+        return states, rewards, terminated
+
+    def _update_wind(self):
+        t = self.stepnum * (self.substeps * self.time_step)
+        self.boat.wind = self.wind.sample_one(self.boat.x, self.boat.y, t)
+
+    def _physics(self, boat_class):
+        return partial(
+            physics_class(boat_class, self.physics_backend),
+            time_step=self.time_step,
+            integrator=self.integrator,
+        )
+
     def render(self):
         if self.render_mode == "rgb_array" and self.renderer is not None:
-            return self._render_frame()
+            return self._render_frame().copy()
 
         elif self.render_mode == "ansi":
             print(
                 f"Speed: {self.boat.speed:.2f}, Heading: {self.boat.heading:.2f}, Heading Dot: {self.boat.heading_dot:.2f}, Heading to Target: {self.boat.heading2target:.2f}, Distance to Target: {self.boat.distance2target:.2f}"
             )
 
-    def _render_frame(self):
+    def render_into(self, out):
+        """Renders an rgb_array frame into out, a (height, width, 3) uint8 array,
+        without allocating a new array."""
+        assert self.render_mode == "rgb_array" and self.renderer is not None
+        return self._render_frame(out)
+
+    def _render_frame(self, out=None):
         return self.renderer._render_frame(
             boats=[
                 (
@@ -150,24 +367,473 @@ class BoatEnv(gym.Env):
             reward=self.last_reward,
             render_mode=self.render_mode,
             fps=self.metadata["render_fps"],
+            out=out,
         )
 
     def close(self):
         if self.renderer is not None:
             self.renderer.close()
 
+    def __getstate__(self):
+        # copies and pickles leave out the timed methods, re-attached on load
+        state = self.__dict__.copy()
+        for name in METHODS:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.instrumentation is not None:
+            self.instrumentation.attach()
+
 
 def norm(angle):
     return (angle + np.pi) % (2 * np.pi) - np.pi
 
 
+def norm_inplace(angle):
+    """norm for an array, overwriting it."""
+    angle += np.pi
+    np.remainder(angle, 2 * np.pi, out=angle)
+    angle -= np.pi
+
+
+def state_bounds(course_size, local_wind):
+    """Bounds (low, high) of the state observation of a boat."""
+    low = np.array([-10, -np.pi, -1, -np.pi, 0])
+    high = np.array([10, np.pi, 1, np.pi, course_size * 2])
+    if local_wind:
+        # wind speed and the direction it blows from, relative to north
+        low = np.append(low, [0, -np.pi])
+        high = np.append(high, [20, np.pi])
+    return low, high
+
+
+def make_rasterizer(env, size, grayscale):
+    """Rasterizer of the pixel observations of the course of env."""
+    return Rasterizer(
+        size,
+        env.COURSE_SIZE,
+        env.TARGET,
+        env.TARGET_RAD,
+        env.BOAT_LENGTH,
+        env.BOAT_BEAM,
+        grayscale,
+    )
+
+
+def reset_key(seed):
+    """Philox key of the initial-state stream of a seed."""
+    return np.random.SeedSequence(int(seed)).generate_state(2, np.uint64)
+
+
+def sample_initial_states(course_size, keys, episodes):
+    """Samples the initial boat states of a batch of envs from one counter-based
+    Philox generator, returned as a dict of arrays.
+
+    Env i draws from the stream keyed by keys[i] with the counter starting at
+    episode number episodes[i], so any single episode of a run can be replayed
+    without drawing the ones before it.
+    """
+    bit_generator = np.random.Philox(0)
+    generator = np.random.Generator(bit_generator)
+    state = bit_generator.state
+    uniform = np.empty((len(keys), 4))
+    for i, (key, episode) in enumerate(zip(keys, episodes)):
+        state["state"] = {
+            "counter": np.array([0, 0, 0, episode], dtype=np.uint64),
+            "key": key,
+        }
+        bit_generator.state = state
+        uniform[i] = generator.random(4)
+
+    return {
+        "x": course_size * (0.5 + (uniform[:, 0] * 0.4 - 0.2)),
+        "y": np.full(len(uniform), course_size * 0.10),
+        "heading": uniform[:, 1] * np.pi * 2,
+        "heading_dot": uniform[:, 2] * 0.06 - 0.03,
+        "speed": uniform[:, 3] * 1.5 - 1,
+    }
+
+
+PHYSICS_BACKENDS = ["python", "jit"]
+
+
+def check_physics_backend(physics_backend):
+    assert physics_backend in PHYSICS_BACKENDS
+    if physics_backend == "jit":
+        from gym_sailing.physics.jit import NUMBA_AVAILABLE
+
+        if not NUMBA_AVAILABLE:
+            gym.logger.warn(
+                "numba is not installed, falling back to the python physics backend"
+            )
+            return "python"
+    return physics_backend
+
+
+def physics_class(boat_class, physics_backend):
+    """Returns the implementation of boat_class for the given physics backend."""
+    if physics_backend == "jit":
+        from gym_sailing.physics.jit import JIT_CLASSES
+
+        return JIT_CLASSES[boat_class]
+    return boat_class
+
+
 # Discrete action space version of BoatEnv
 class BoatDiscreteEnv(BoatEnv):
-    def __init__(self, render_mode=None):
-        super().__init__(render_mode)
+    def __init__(self, render_mode=None, **kwargs):
+        super().__init__(render_mode, **kwargs)
         self.action_space = spaces.Discrete(3)
 
     def step(self, action):
         action = action - 1
         return super().step([action])
-        return super().step([action])
+
+    def _rudder(self, actions):
+        return np.asarray(actions, dtype=np.float64).reshape(-1) - 1
+
+
+class BoatVectorEnv(VectorEnv):
+    """Runs num_envs copies of a BoatEnv with all boats held in one BoatBatch.
+
+    Physics, observations, rewards and autoreset are computed for every
+    sub-environment with array operations, following the NEXT_STEP autoreset
+    convention used by gymnasium's SyncVectorEnv.
+    """
+
+    BOAT_BEAM = BoatEnv.BOAT_BEAM
+    BOAT_LENGTH = BoatEnv.BOAT_LENGTH
+    TARGET_RAD = BoatEnv.TARGET_RAD
+    COURSE_SIZE = BoatEnv.COURSE_SIZE
+    TARGET = BoatEnv.TARGET
+    BOAT_TYPE = "sailboat"
+
+    metadata = {
+        "render_modes": ["rgb_array"],
+        "render_fps": BoatEnv.metadata["render_fps"],
+        "autoreset_mode": AutoresetMode.NEXT_STEP,
+    }
+
+    def __init__(
+        self,
+        num_envs=1,
+        max_episode_steps=None,
+        render_mode=None,
+        physics_backend="python",
+        render_quality="atlas",
+        render_incremental=None,
+        substeps=1,
+        time_step=Boat.TIME_STEP,
+        integrator="euler",
+        obs_buffer=None,
+        return_info=True,
+        wind=None,
+        local_wind=False,
+        dtype=np.float64,
+        physics_dtype=np.float64,
+        obs_type="state",
+        pixel_size=64,
+        grayscale=False,
+        frame_stack=1,
+    ):
+        assert render_mode is None or render_mode in self.metadata["render_modes"]
+        assert substeps >= 1
+        assert obs_type in OBS_TYPES
+        self.num_envs = num_envs
+        self.dtype = np.dtype(dtype)
+        self.physics_dtype = np.dtype(physics_dtype)  # of the boat state
+        self.wind = wind
+        self.local_wind = local_wind
+        self.obs_buffer = obs_buffer
+        self.return_info = return_info
+        self.max_episode_steps = max_episode_steps
+        self.render_mode = render_mode
+        self.physics_backend = check_physics_backend(physics_backend)
+        self.substeps = substeps
+        self.time_step = time_step
+        self.integrator = integrator
+        self.render_quality = render_quality
+        self.render_incremental = render_incremental
+        self.renderers = None
+
+        self.boats = self._make_boats(num_envs)
+        self.reset_keys = np.zeros((num_envs, 2), dtype=np.uint64)
+        self.episodes = np.zeros(num_envs, dtype=np.uint64)
+
+        self.stepnum = np.zeros(num_envs, dtype=np.int64)
+        self.last_reward = np.zeros(num_envs)
+        self.last_action = np.zeros(num_envs, self.physics_dtype)
+        self.prev_potential = np.zeros(num_envs, self.physics_dtype)
+        # scratch arrays of _get_obs
+        self.distance = np.zeros(num_envs, self.physics_dtype)
+        self.potential = np.zeros(num_envs, self.physics_dtype)
+        self._dx = np.zeros(num_envs, self.physics_dtype)
+        self._dy = np.zeros(num_envs, self.physics_dtype)
+        self._tmp = np.zeros(num_envs, self.physics_dtype)
+        self.prev_done = np.zeros(num_envs, dtype=np.bool_)
+
+        self.low, self.high = self._observation_bounds(
+            *state_bounds(self.COURSE_SIZE, local_wind)
+        )
+
+        self.single_action_space = self._make_single_action_space()
+        self.action_space = batch_space(self.single_action_space, num_envs)
+        self.single_observation_space = spaces.Box(
+            self.low.astype(dtype), self.high.astype(dtype), dtype=dtype
+        )
+        self._state_buffer = obs_buffer  # of the state observations
+        self.pixels = None
+        if obs_type == "pixels":
+            self._state_buffer = np.empty((num_envs, len(self.low)), dtype)
+            self.pixels = PixelObservations(
+                make_rasterizer(self, pixel_size, grayscale),
+                num_envs,
+                frame_stack,
+                obs_buffer,
+            )
+            self.single_observation_space = spaces.Box(
+                0, 255, self.pixels.shape[1:], dtype=np.uint8
+            )
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        assert obs_buffer is None or (
+            obs_buffer.shape == self.observation_space.shape
+            and obs_buffer.dtype == self.observation_space.dtype
+        )
+
+    @abstractmethod
+    def _make_boats(self, n):
+        """Returns the BoatBatch simulated by this environment."""
+
+    def _physics(self, boat_class):
+        return partial(
+            physics_class(boat_class, self.physics_backend),
+            time_step=self.time_step,
+            integrator=self.integrator,
+            dtype=self.physics_dtype,
+        )
+
+    def _observation_bounds(self, low, high):
+        """Bounds of the observation of a sub-environment, from those of BoatEnv."""
+        return low, high
+
+    def _make_single_action_space(self):
+        return spaces.Box(low=-1.0, high=1.0, shape=(1,), dtype=self.dtype)
+
+    def _rudder(self, action):
+        return np.clip(
+            np.asarray(action, dtype=self.physics_dtype).reshape(self.num_envs), -1, 1
+        )
+
+    def _reset_boats(self, index):
+        # Same streams as BoatEnv.reset
+        state = sample_initial_states(
+            self.COURSE_SIZE, self.reset_keys[index], self.episodes[index]
+        )
+        self.boats.reset(index, state["x"], state["y"], state["heading"])
+
+        if self.renderers is not None:
+            for i in index:
+                self.renderers[i].reset()
+
+        self.stepnum[index] = 0
+        self.last_reward[index] = 0
+        self.last_action[index] = 0
+        self.prev_potential[index] = (
+            np.abs(self.boats.x[index] - self.TARGET[0]) ** 8
+            + np.abs(self.boats.y[index] - self.TARGET[1]) ** 8
+        ) ** 0.125
+
+    def reset(self, *, seed=None, options=None):
+        super().reset(seed=seed if isinstance(seed, int) else None)
+        if seed is None or isinstance(seed, int):
+            seed = [None if seed is None else seed + i for i in range(self.num_envs)]
+        assert len(seed) == self.num_envs
+        if options is not None and "wind_seed" in options:
+            wind_seed = options["wind_seed"]
+        else:
+            wind_seed = int(self.np_random.integers(2**63))
+        if self.wind is not None:
+            # one field shared by all the sub-environments
+            self.wind.reset(np.random.default_rng(wind_seed))
+        self.reset_keys = np.array(
+            [
+                reset_key(self.np_random.integers(2**63) if s is None else s)
+                for s in seed
+            ]
+        )
+        self.episodes = np.zeros(self.num_envs, dtype=np.uint64)
+
+        self._reset_boats(np.arange(self.num_envs))
+        if self.wind is not None:
+            self._update_wind(slice(None))
+        self.prev_done[:] = False
+
+        obs = self._get_obs()
+        if self.pixels is not None:
+            obs = self._pixel_obs(slice(None))
+        return obs, {}
+
+    def step(self, action):
+        rudder = self._rudder(action)
+        self.stepnum += 1
+        self.last_action = rudder
+        self.boats.command(rudder, self.substeps)
+
+        # Reset all environments which terminated or were truncated in the last step
+        resetting = self.prev_done
+        if resetting.any():
+            self.episodes[resetting] += 1
+            self._reset_boats(np.flatnonzero(resetting))
+        if self.wind is not None and (not self.wind.CONSTANT or resetting.any()):
+            self._update_wind(slice(None))
+
+        obs = self._get_obs()
+        terminated, reward = self._get_reward()
+        if self.pixels is not None:
+            obs = self._pixel_obs(resetting)
+
+        truncated = np.zeros(self.num_envs, dtype=np.bool_)
+        if self.max_episode_steps is not None:
+            truncated = self.stepnum >= self.max_episode_steps
+
+        reward[resetting] = 0.0
+        terminated[resetting] = False
+        truncated[resetting] = False
+        self.last_reward = reward
+        self.prev_done = terminated | truncated
+
+        info = {}
+        if self.return_info:
+            info["distance2target"] = self.distance.copy()
+            info["_distance2target"] = ~resetting
+        return obs, reward, terminated, truncated, info
+
+    def _get_reward(self):
+        """Rewards from the distance and potential left by _get_obs."""
+        terminated = self.distance < self.TARGET_RAD
+        reward = np.where(terminated, 100.0, -0.1)  # Alive penalty
+
+        off_course = self.distance >= self.COURSE_SIZE
+        reward[off_course] = -100.0
+        terminated |= off_course
+
+        # 8-norm previous distance to target - current distance to target
+        reward += 10 * (self.prev_potential - self.potential)
+
+        self.prev_potential[:] = self.potential
+        return terminated, reward
+
+    def _get_obs(self):
+        """Writes the observations, and the distance to the target and shaping
+        potential of every boat, into preallocated arrays."""
+        obs = self._state_buffer
+        if obs is None:
+            obs = np.empty((self.num_envs, len(self.low)), self.dtype)
+        dx = np.subtract(self.boats.x, self.TARGET[0], out=self._dx)
+        dy = np.subtract(self.boats.y, self.TARGET[1], out=self._dy)
+        tmp = self._tmp  # not the obs columns, which may have a narrower dtype
+
+        distance = np.multiply(dx, dx, out=self.distance)
+        distance += np.multiply(dy, dy, out=tmp)
+        np.sqrt(distance, out=distance)
+        np.multiply(distance, 2, out=tmp)
+        tmp /= self.COURSE_SIZE
+        obs[:, 4] = tmp
+
+        potential = np.abs(dx, out=self.potential)
+        potential **= 8
+        potential += np.power(np.abs(dy, out=tmp), 8, out=tmp)
+        potential **= 0.125
+
+        # on contiguous arrays, strided ones take a different arctan2 loop
+        heading2target = np.arctan2(
+            np.negative(dy, out=dy), np.negative(dx, out=dx), out=dx
+        )
+        heading2target -= np.pi / 2
+        norm_inplace(heading2target)
+        obs[:, 3] = heading2target
+        np.subtract(self.boats.heading, np.pi / 2, out=obs[:, 1])
+        norm_inplace(obs[:, 1])
+        obs[:, 0] = self.boats.speed
+        obs[:, 2] = self.boats.heading_dot
+        if self.local_wind:
+            wind_x, wind_y = self.boats.wind_x, self.boats.wind_y
+            np.sqrt(wind_x * wind_x + wind_y * wind_y, out=obs[:, 5])
+            np.subtract(self.boats.wind_direction, np.pi / 2, out=obs[:, 6])
+            norm_inplace(obs[:, 6])
+
+        return obs
+
+    def _pixel_obs(self, restart):
+        """The pixel observations, new stacks of frames for the restart envs."""
+        boats = self.boats
+        obs = self.pixels.observe(boats.x, boats.y, boats.heading, restart)
+        return obs if self.obs_buffer is not None else obs.copy()
+
+    def _update_wind(self, index):
+        t = self.stepnum[index] * (self.substeps * self.time_step)
+        wind_x, wind_y = self.wind.sample(self.boats.x[index], self.boats.y[index], t)
+        self.boats.set_wind(index, wind_x, wind_y)
+
+    def render(self):
+        if self.render_mode != "rgb_array":
+            return None
+        return tuple(self._render_env(i).copy() for i in range(self.num_envs))
+
+    def render_into(self, out):
+        """Renders every sub-environment into out, a (num_envs, height, width, 3)
+        uint8 array, without allocating new arrays."""
+        assert self.render_mode == "rgb_array"
+        for i in range(self.num_envs):
+            self._render_env(i, out[i])
+        return out
+
+    def _render_env(self, i, out=None):
+        if self.renderers is None:
+            from gym_sailing.utils.renderer import Renderer
+
+            self.renderers = [
+                Renderer(
+                    self.BOAT_LENGTH,
+                    self.BOAT_BEAM,
+                    self.TARGET_RAD,
+                    self.COURSE_SIZE,
+                    self.render_quality,
+                    incremental=self.render_incremental,
+                )
+                for _ in range(self.num_envs)
+            ]
+
+        return self.renderers[i]._render_frame(
+            boats=[
+                (
+                    self.boats.x[i],
+                    self.boats.y[i],
+                    self.boats.heading[i] - np.pi / 2,
+                    self.last_action[i],
+                    self.BOAT_TYPE,
+                )
+            ],
+            target=self.TARGET,
+            stepnum=self.stepnum[i],
+            reward=self.last_reward[i],
+            render_mode=self.render_mode,
+            fps=self.metadata["render_fps"],
+            out=out,
+        )
+
+    def close_extras(self, **kwargs):
+        if self.renderers is not None:
+            for renderer in self.renderers:
+                renderer.close()
+
+
+# Discrete action space version of BoatVectorEnv
+class BoatDiscreteVectorEnv(BoatVectorEnv):
+    def _make_single_action_space(self):
+        return spaces.Discrete(3)
+
+    def _rudder(self, action):
+        return np.asarray(action, dtype=self.physics_dtype).reshape(self.num_envs) - 1
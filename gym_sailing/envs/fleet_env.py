@@ -0,0 +1,275 @@
+import numpy as np
+from gymnasium.vector import AutoresetMode
+
+from gym_sailing.envs.boat_env import BoatEnv, BoatVectorEnv, norm_inplace
+from gym_sailing.envs.sailboat_env import load_polar
+from gym_sailing.physics.collision import SpatialHash, hull_radius, hulls_overlap
+from gym_sailing.physics.motorboat import MotorBoatBatch
+from gym_sailing.physics.sailboat import SailBoatBatch
+
+
+class BoatFleetEnv(BoatVectorEnv):
+    """n_boats boats racing on the same course, sharing the wind and the target.
+
+    The batched API is the one of BoatVectorEnv, with one entry per boat, but
+    there is no autoreset: a boat that reaches the target or leaves the course
+    stays where it finished, reporting terminated and no reward, until the
+    whole fleet is reset.
+
+    Boats still racing are kept in a spatial hash for proximity and collision
+    queries. With neighbours=k the observation of each boat is followed by the
+    distance, bearing and heading of its k nearest boats within
+    neighbour_radius meters, closest first, padded with neighbour_radius and
+    zeros. With a collision_penalty, boats whose hulls overlap another one lose
+    it every step and info["collisions"] counts the boats they touch.
+    """
+
+    metadata = {
+        "render_modes": ["human", "rgb_array"],
+        "render_fps": BoatEnv.metadata["render_fps"],
+        "autoreset_mode": AutoresetMode.DISABLED,
+    }
+
+    def __init__(
+        self,
+        n_boats=BoatEnv.N_BOATS,
+        neighbours=0,
+        neighbour_radius=10.0,
+        collision_penalty=None,
+        **kwargs,
+    ):
+        assert kwargs.get("obs_type", "state") == "state", "fleets observe states"
+        self.neighbours = neighbours
+        self.neighbour_radius = neighbour_radius
+        self.collision_penalty = collision_penalty
+        self.hull_radius = hull_radius(self.BOAT_LENGTH, self.BOAT_BEAM)
+        cell_size = max(self.hull_radius, neighbour_radius if neighbours else 0.0)
+        self.spatial_hash = SpatialHash(self.COURSE_SIZE, cell_size)
+        self._hashed = False
+        super().__init__(n_boats, **kwargs)
+        self.n_boats = n_boats
+        self.renderer = None
+
+    def _observation_bounds(self, low, high):
+        self._neighbour_column = len(low)
+        neighbour_low = np.array([0, -np.pi, -np.pi] * self.neighbours)
+        neighbour_high = np.array(
+            [self.neighbour_radius, np.pi, np.pi] * self.neighbours
+        )
+        return np.append(low, neighbour_low), np.append(high, neighbour_high)
+
+    def reset(self, *, seed=None, options=None):
+        obs, info = super().reset(seed=seed, options=options)
+        if self.renderer is not None:
+            self.renderer.reset()
+        return obs, info
+
+    def step(self, action):
+        rudder = self._rudder(action)
+        finished = self.prev_done  # boats that terminated in an earlier step
+        self.stepnum += 1
+        self.last_action = rudder
+
+        frozen = self.boats.get_state(finished)
+        self.boats.command(rudder, self.substeps)
+        self.boats.set_state(finished, frozen)
+        if self.wind is not None and not self.wind.CONSTANT:
+            self._update_wind(slice(None))
+
+        obs = self._get_obs()
+        terminated, reward = self._get_reward()
+        if self.collision_penalty is not None:
+            collisions = self.collisions()
+            reward[collisions > 0] -= self.collision_penalty
+
+        truncated = np.zeros(self.num_envs, dtype=np.bool_)
+        if self.max_episode_steps is not None:
+            truncated = self.stepnum >= self.max_episode_steps
+
+        reward[finished] = 0.0
+        self.last_action[finished] = 0.0
+        terminated |= finished
+        truncated &= ~terminated
+        self.last_reward = reward
+        self.prev_done = terminated
+
+        if self.render_mode == "human":
+            self._render_frame()
+
+        info = {}
+        if self.return_info:
+            info["distance2target"] = self.distance.copy()
+            if self.collision_penalty is not None:
+                info["collisions"] = collisions
+        return obs, reward, terminated, truncated, info
+
+    def _get_obs(self):
+        self._hashed = False  # the boats moved
+        obs = super()._get_obs()
+        if self.neighbours:
+            self._neighbour_obs(obs)
+        return obs
+
+    def _neighbour_obs(self, obs):
+        index, distance = self.nearest_boats(self.neighbours, self.neighbour_radius)
+        found = index >= 0
+        # boats without neighbours stand in for the missing ones
+        index = np.where(found, index, np.arange(self.num_envs)[:, None])
+        x, y, heading = self.boats.x, self.boats.y, self.boats.heading
+        bearing = np.arctan2(y[index] - y[:, None], x[index] - x[:, None])
+        bearing -= np.pi / 2
+        norm_inplace(bearing)
+        heading = heading[index] - np.pi / 2
+        norm_inplace(heading)
+
+        column = self._neighbour_column
+        obs[:, column::3] = np.where(found, distance, self.neighbour_radius)
+        obs[:, column + 1 :: 3] = np.where(found, bearing, 0.0)
+        obs[:, column + 2 :: 3] = np.where(found, heading, 0.0)
+
+    def _spatial_hash(self):
+        """The spatial hash of the boats still racing, rebuilt once per step."""
+        if not self._hashed:
+            self.spatial_hash.update(self.boats.x, self.boats.y, ~self.prev_done)
+            self._hashed = True
+        return self.spatial_hash
+
+    def nearest_boats(self, k, radius):
+        """Indices and distances of the k nearest boats within radius meters of
+        every boat, as (n_boats, k) arrays padded with -1 and inf. radius can't
+        be larger than spatial_hash.cell_size."""
+        return self._spatial_hash().nearest(k, radius)
+
+    def collision_pairs(self):
+        """Indices (i, j) of the pairs of boats still racing whose hulls overlap,
+        each pair once."""
+        i, j, _ = self._spatial_hash().pairs(self.hull_radius)
+        overlap = hulls_overlap(
+            self.boats.x,
+            self.boats.y,
+            self.boats.heading,
+            i,
+            j,
+            self.BOAT_LENGTH,
+            self.BOAT_BEAM,
+        )
+        return i[overlap], j[overlap]
+
+    def collisions(self):
+        """Number of boats whose hull overlaps the one of every boat."""
+        i, j = self.collision_pairs()
+        return np.bincount(np.concatenate((i, j)), minlength=self.num_envs)
+
+    def render(self):
+        if self.render_mode == "rgb_array":
+            return self._render_frame().copy()
+
+    def _render_frame(self):
+        if self.renderer is None:
+            from gym_sailing.utils.renderer import Renderer
+
+            self.renderer = Renderer(
+                self.BOAT_LENGTH,
+                self.BOAT_BEAM,
+                self.TARGET_RAD,
+                self.COURSE_SIZE,
+                self.render_quality,
+                trails="all",
+                incremental=self.render_incremental,
+            )
+
+        heading = self.boats.heading - np.pi / 2
+        return self.renderer._render_frame(
+            boats=[
+                (x, y, h, a, self.BOAT_TYPE)
+                for x, y, h, a in zip(
+                    self.boats.x.tolist(),
+                    self.boats.y.tolist(),
+                    heading.tolist(),
+                    self.last_action.tolist(),
+                )
+            ],
+            target=self.TARGET,
+            stepnum=int(self.stepnum.max()),
+            reward=float(self.last_reward.mean()),
+            render_mode=self.render_mode,
+            fps=self.metadata["render_fps"],
+        )
+
+    def close_extras(self, **kwargs):
+        if self.renderer is not None:
+            self.renderer.close()
+
+
+class SailboatFleetEnv(BoatFleetEnv):
+    def __init__(self, n_boats=BoatEnv.N_BOATS, polar=None, **kwargs):
+        self.polar = load_polar(polar)
+        super().__init__(n_boats, **kwargs)
+
+    def _make_boats(self, n):
+        return self._physics(SailBoatBatch)(n, polar=self.polar)
+
+
+class MotorboatFleetEnv(BoatFleetEnv):
+    BOAT_TYPE = "motorboat"
+
+    def _make_boats(self, n):
+        return self._physics(MotorBoatBatch)(n)
+
+
+class FleetParallelEnv:
+    """PettingZoo ParallelEnv style interface to a BoatFleetEnv, where every
+    boat is an agent that leaves the episode once it is terminated or truncated.
+    """
+
+    def __init__(self, fleet):
+        self.fleet = fleet
+        self.metadata = fleet.metadata
+        self.render_mode = fleet.render_mode
+        self.possible_agents = [f"boat_{i}" for i in range(fleet.num_envs)]
+        self.agent_index = {agent: i for i, agent in enumerate(self.possible_agents)}
+        self.agents = []
+
+    def observation_space(self, agent):
+        return self.fleet.single_observation_space
+
+    def action_space(self, agent):
+        return self.fleet.single_action_space
+
+    def reset(self, seed=None, options=None):
+        obs, _ = self.fleet.reset(seed=seed, options=options)
+        self.agents = self.possible_agents[:]
+        return (
+            dict(zip(self.agents, obs)),
+            {agent: {} for agent in self.agents},
+        )
+
+    def step(self, actions):
+        action = np.zeros(
+            self.fleet.action_space.shape, dtype=self.fleet.action_space.dtype
+        )
+        for agent, agent_action in actions.items():
+            action[self.agent_index[agent]] = agent_action
+
+        obs, reward, terminated, truncated, info = self.fleet.step(action)
+
+        live = [self.agent_index[agent] for agent in self.agents]
+        observations = {a: obs[i] for a, i in zip(self.agents, live)}
+        rewards = {a: float(reward[i]) for a, i in zip(self.agents, live)}
+        terminations = {a: bool(terminated[i]) for a, i in zip(self.agents, live)}
+        truncations = {a: bool(truncated[i]) for a, i in zip(self.agents, live)}
+        infos = {
+            a: {key: value[i] for key, value in info.items()}
+            for a, i in zip(self.agents, live)
+        }
+
+        self.agents = [
+            a for a in self.agents if not (terminations[a] or truncations[a])
+        ]
+        return observations, rewards, terminations, truncations, infos
+
+    def render(self):
+        return self.fleet.render()
+
+    def close(self):
+        self.fleet.close()
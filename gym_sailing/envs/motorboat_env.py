@@ -1,23 +1,21 @@
 import numpy as np
-from gym_sailing.envs.boat_env import BoatEnv
-from gym_sailing.physics.motorboat import MotorBoat
+from gym_sailing.envs.boat_env import BoatEnv, BoatVectorEnv
+from gym_sailing.physics.motorboat import MotorBoat, MotorBoatBatch
 
 
 class MotorboatEnv(BoatEnv):
-    def __init__(self, render_mode=None):
-        super().__init__(render_mode)
-
-    def reset(self, options=None, seed=None):
-        self.boat = MotorBoat(
-            x=self.COURSE_SIZE * (0.5 + np.random.uniform(-0.2, 0.2)),
-            y=self.COURSE_SIZE * 0.10,
-            heading=self.np_random.random() * np.pi * 2,
-            heading_dot=np.random.uniform(-0.03, 0.03),
-            speed=np.random.uniform(-1, 0.5),
-        )
-        return super().reset(options, seed)
+    BOAT_TYPE = "motorboat"
+
+    def __init__(self, render_mode=None, **kwargs):
+        super().__init__(render_mode, **kwargs)
+
+    def _make_boat(self, x, y, heading, heading_dot, speed):
+        return self._physics(MotorBoat)(x, y, heading, heading_dot, speed)
+
+    def _make_boats(self, n):
+        return self._physics(MotorBoatBatch)(n)
 
-    def _render_frame(self):
+    def _render_frame(self, out=None):
         return self.renderer._render_frame(
             boats=[
                 (
@@ -25,7 +23,7 @@ class MotorboatEnv(BoatEnv):
                     self.boat.y,
                     self.boat.heading - np.pi / 2,
                     self.last_action,
-                    "motorboat",
+                    self.BOAT_TYPE,
                 )
             ],
             target=self.TARGET,
@@ -33,4 +31,12 @@ class MotorboatEnv(BoatEnv):
             reward=self.last_reward,
             render_mode=self.render_mode,
             fps=self.metadata["render_fps"],
+            out=out,
         )
+
+
+class MotorboatVectorEnv(BoatVectorEnv):
+    BOAT_TYPE = "motorboat"
+
+    def _make_boats(self, n):
+        return self._physics(MotorBoatBatch)(n)
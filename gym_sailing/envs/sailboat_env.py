@@ -1,34 +1,61 @@
-import numpy as np
+from gym_sailing.envs.boat_env import (
+    BoatDiscreteEnv,
+    BoatDiscreteVectorEnv,
+    BoatEnv,
+    BoatVectorEnv,
+)
+from gym_sailing.physics.polar import Polar
+from gym_sailing.physics.sailboat import SailBoat, SailBoatBatch
 
-from gym_sailing.envs.boat_env import BoatDiscreteEnv, BoatEnv
-from gym_sailing.physics.sailboat import SailBoat
+
+def load_polar(polar):
+    """Accepts a Polar, a path to a polar file or None for the default polar."""
+    if polar is None or isinstance(polar, Polar):
+        return polar
+    return Polar.load(polar)
 
 
 class SailboatEnv(BoatEnv):
-    def __init__(self, render_mode=None):
-        super().__init__(render_mode)
-
-    def reset(self, options=None, seed=None):
-        self.boat = SailBoat(
-            x=self.COURSE_SIZE * (0.5 + np.random.uniform(-0.2, 0.2)),
-            y=self.COURSE_SIZE * 0.10,
-            heading=self.np_random.random() * np.pi * 2,
-            heading_dot=np.random.uniform(-0.03, 0.03),
-            speed=np.random.uniform(-1, 0.5),
+    def __init__(self, render_mode=None, polar=None, **kwargs):
+        super().__init__(render_mode, **kwargs)
+        self.polar = load_polar(polar)
+
+    def _make_boat(self, x, y, heading, heading_dot, speed):
+        return self._physics(SailBoat)(
+            x, y, heading, heading_dot, speed, polar=self.polar
         )
-        return super().reset(options, seed)
+
+    def _make_boats(self, n):
+        return self._physics(SailBoatBatch)(n, polar=self.polar)
 
 
 class SailboatDiscreteEnv(BoatDiscreteEnv):
-    def __init__(self, render_mode=None):
-        super().__init__(render_mode)
-
-    def reset(self, options=None, seed=None):
-        self.boat = SailBoat(
-            x=self.COURSE_SIZE * (0.5 + np.random.uniform(-0.2, 0.2)),
-            y=self.COURSE_SIZE * 0.10,
-            heading=self.np_random.random() * np.pi * 2,
-            heading_dot=np.random.uniform(-0.03, 0.03),
-            speed=np.random.uniform(-1, 0.5),
+    def __init__(self, render_mode=None, polar=None, **kwargs):
+        super().__init__(render_mode, **kwargs)
+        self.polar = load_polar(polar)
+
+    def _make_boat(self, x, y, heading, heading_dot, speed):
+        return self._physics(SailBoat)(
+            x, y, heading, heading_dot, speed, polar=self.polar
         )
-        return super().reset(options, seed)
+
+    def _make_boats(self, n):
+        return self._physics(SailBoatBatch)(n, polar=self.polar)
+
+
+class SailboatVectorEnv(BoatVectorEnv):
+    def __init__(self, num_envs=1, polar=None, **kwargs):
+        self.polar = load_polar(polar)
+        super().__init__(num_envs, **kwargs)
+
+    def _make_boats(self, n):
+        return self._physics(SailBoatBatch)(n, polar=self.polar)
+
+
+class SailboatDiscreteVectorEnv(BoatDiscreteVectorEnv):
+    def __init__(self, num_envs=1, polar=None, **kwargs):
+        self.polar = load_polar(polar)
+        super().__init__(num_envs, **kwargs)
+
+    def _make_boats(self, n):
+        return self._physics(SailBoatBatch)(n, polar=self.polar)
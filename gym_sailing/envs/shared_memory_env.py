@@ -0,0 +1,223 @@
+"""Multi-process vector environment exchanging data through shared memory"""
+
+import math
+import multiprocessing as mp
+import os
+import traceback
+
+import gymnasium as gym
+import numpy as np
+from gymnasium.envs.registration import load_env_creator
+from gymnasium.vector import AutoresetMode, VectorEnv
+from gymnasium.vector.utils import batch_space
+
+
+def _shared_array(ctx, shape, dtype):
+    """A lock-free shared buffer, sent to the workers when they are started."""
+    size = math.prod(shape) * np.dtype(dtype).itemsize
+    return ctx.RawArray("B", size), shape, dtype
+
+
+def _as_array(shared):
+    buffer, shape, dtype = shared
+    return np.frombuffer(buffer, dtype=dtype).reshape(shape)
+
+
+def _worker(env_creator, kwargs, start, stop, shared, pipe, core):
+    if core is not None:
+        os.sched_setaffinity(0, {core})
+    arrays = {name: _as_array(buffer) for name, buffer in shared.items()}
+    env = env_creator(
+        num_envs=stop - start,
+        obs_buffer=arrays["observations"][start:stop],
+        **kwargs,
+    )
+
+    try:
+        while True:
+            command, data = pipe.recv()
+            if command == "close":
+                break
+            try:
+                if command == "reset":
+                    seed, wind_seed = data
+                    env.reset(seed=seed, options={"wind_seed": wind_seed})
+                    arrays["rewards"][start:stop] = 0.0
+                    arrays["terminations"][start:stop] = False
+                    arrays["truncations"][start:stop] = False
+                else:
+                    _, reward, terminated, truncated, info = env.step(
+                        arrays["actions"][start:stop]
+                    )
+                    arrays["rewards"][start:stop] = reward
+                    arrays["terminations"][start:stop] = terminated
+                    arrays["truncations"][start:stop] = truncated
+                    if info:
+                        arrays["distance2target"][start:stop] = info["distance2target"]
+                        arrays["_distance2target"][start:stop] = info[
+                            "_distance2target"
+                        ]
+                if "frames" in arrays:
+                    env.render_into(arrays["frames"][start:stop])
+                pipe.send(None)
+            except Exception:
+                pipe.send(traceback.format_exc())
+    finally:
+        env.close()
+
+
+class SharedMemoryVectorEnv(VectorEnv):
+    """Runs the native vector environment of env_id split over worker processes.
+
+    Each worker steps a contiguous slice of envs_per_worker sub-environments and
+    writes observations, rewards, dones, infos and, in rgb_array mode, frames
+    into shared memory, so only a short command goes through the pipes on every
+    step. With pin_cores=True worker i is pinned to the i-th available core, a
+    list of cores can also be given.
+    """
+
+    metadata = {
+        "render_modes": ["rgb_array"],
+        "autoreset_mode": AutoresetMode.NEXT_STEP,
+    }
+
+    def __init__(
+        self,
+        env_id,
+        num_envs,
+        envs_per_worker=None,
+        render_mode=None,
+        pin_cores=False,
+        context=None,
+        return_info=True,
+        **kwargs,
+    ):
+        assert render_mode is None or render_mode in self.metadata["render_modes"]
+        spec = gym.spec(env_id)
+        env_creator = load_env_creator(spec.vector_entry_point)
+        kwargs = {
+            "max_episode_steps": spec.max_episode_steps,
+            **spec.kwargs,
+            **kwargs,
+            "render_mode": render_mode,
+            "return_info": return_info,
+        }
+
+        self.num_envs = num_envs
+        self.render_mode = render_mode
+        self.return_info = return_info
+
+        env = env_creator(num_envs=1, **kwargs)
+        self.single_observation_space = env.single_observation_space
+        self.single_action_space = env.single_action_space
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+        course_size = env.COURSE_SIZE
+        env.close()
+
+        if envs_per_worker is None:
+            envs_per_worker = math.ceil(num_envs / os.cpu_count())
+        self.envs_per_worker = envs_per_worker
+        slices = [
+            (start, min(start + envs_per_worker, num_envs))
+            for start in range(0, num_envs, envs_per_worker)
+        ]
+        if pin_cores is True:
+            pin_cores = sorted(os.sched_getaffinity(0))
+        cores = [None] * len(slices)
+        if pin_cores:
+            cores = [pin_cores[i % len(pin_cores)] for i in range(len(slices))]
+
+        ctx = mp.get_context(context)
+        shared = {
+            "observations": _shared_array(
+                ctx, self.observation_space.shape, self.observation_space.dtype
+            ),
+            "actions": _shared_array(
+                ctx, self.action_space.shape, self.action_space.dtype
+            ),
+            "rewards": _shared_array(ctx, (num_envs,), np.float64),
+            "terminations": _shared_array(ctx, (num_envs,), np.bool_),
+            "truncations": _shared_array(ctx, (num_envs,), np.bool_),
+            "distance2target": _shared_array(ctx, (num_envs,), np.float64),
+            "_distance2target": _shared_array(ctx, (num_envs,), np.bool_),
+        }
+        if render_mode == "rgb_array":
+            from gym_sailing.utils.renderer import Renderer
+
+            shared["frames"] = _shared_array(
+                ctx, (num_envs, *Renderer.frame_shape(course_size)), np.uint8
+            )
+        self.frames = None
+        for name, buffer in shared.items():
+            setattr(self, name, _as_array(buffer))
+
+        self.slices = slices
+        self.pipes = []
+        self.processes = []
+        for (start, stop), core in zip(slices, cores):
+            parent_pipe, child_pipe = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                args=(env_creator, kwargs, start, stop, shared, child_pipe, core),
+                daemon=True,
+            )
+            process.start()
+            child_pipe.close()
+            self.pipes.append(parent_pipe)
+            self.processes.append(process)
+
+    def _call(self, command, data=None):
+        data = data or [None] * len(self.pipes)  # one item per worker
+        for pipe, item in zip(self.pipes, data):
+            pipe.send((command, item))
+        errors = [error for error in (pipe.recv() for pipe in self.pipes) if error]
+        if errors:
+            raise RuntimeError("Error in a worker process:\n" + errors[0])
+
+    def reset(self, *, seed=None, options=None):
+        super().reset(seed=seed if isinstance(seed, int) else None)
+        # drawn like BoatVectorEnv.reset so every worker gets the same wind field
+        if options is not None and "wind_seed" in options:
+            wind_seed = options["wind_seed"]
+        else:
+            wind_seed = int(self.np_random.integers(2**63))
+        if seed is None:
+            seed = self.np_random.integers(2**63, size=self.num_envs).tolist()
+        elif isinstance(seed, int):
+            seed = [seed + i for i in range(self.num_envs)]
+        assert len(seed) == self.num_envs
+        self._call(
+            "reset",
+            [(list(seed[start:stop]), wind_seed) for start, stop in self.slices],
+        )
+        return self.observations.copy(), {}
+
+    def step(self, actions):
+        self.actions[:] = actions
+        self._call("step")
+
+        info = {}
+        if self.return_info:
+            info["distance2target"] = self.distance2target.copy()
+            info["_distance2target"] = self._distance2target.copy()
+        return (
+            self.observations.copy(),
+            self.rewards.copy(),
+            self.terminations.copy(),
+            self.truncations.copy(),
+            info,
+        )
+
+    def render(self):
+        if self.render_mode != "rgb_array":
+            return None
+        return tuple(self.frames.copy())
+
+    def close_extras(self, **kwargs):
+        for pipe in self.pipes:
+            pipe.send(("close", None))
+        for process in self.processes:
+            process.join()
+        for pipe in self.pipes:
+            pipe.close()
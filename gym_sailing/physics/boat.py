@@ -1,9 +1,18 @@
 """Physics of a generic boat"""
 
+import math
 from abc import ABC, abstractmethod
 
 import numpy as np
 
+from gym_sailing.physics.functional import (
+    SCALAR_OPS,
+    TIME_STEP,
+    BoatParams,
+    BoatState,
+    step,
+)
+
 
 def norm(angle: float) -> float:
     """Normalize angle to be between -pi and pi"""
@@ -20,31 +29,188 @@ def perpendicular(a):
     return np.array([-a[1], a[0]])
 
 
+# "euler" is the original explicit update, stable up to about TIME_STEP.
+# "implicit" takes drag and keel forces at the end of the step, which keeps
+# them stable for any time step.
+INTEGRATORS = ["euler", "implicit"]
+
+
 class Boat(ABC):
-    TIME_STEP = 0.1  # seconds
+    STATE = BoatState._fields
+    TIME_STEP = TIME_STEP  # seconds
     MAX_ANGULAR_VELOCITY = 300.0 / 360.0 * 2 * np.pi * TIME_STEP  # radians per second
     RUDDER_COEFF = 0.002
 
-    def __init__(self, x, y, heading, heading_dot=0.0, speed=0.0):
+    def __init__(
+        self,
+        x,
+        y,
+        heading,
+        heading_dot=0.0,
+        speed=0.0,
+        time_step=TIME_STEP,
+        integrator="euler",
+    ):
+        assert time_step > 0 and integrator in INTEGRATORS
+        self.time_step = float(time_step)
+        self.integrator = integrator
         self.reset(x, y, heading, heading_dot, speed)
-        self.velocity = np.array([0.0, 0.0])
+        self.vx = 0.0
+        self.vy = 0.0
         self.heading_dot = 0.0
         self.mass = 3000.0  # kg
         self.speed = 0.0
+        self.wind = np.array([0.0, -50.0]) * self.TIME_STEP
+
+    @property
+    def wind(self):
+        """True wind velocity at the boat, only felt by sail boats."""
+        return np.array([self.wind_x, self.wind_y])
+
+    @wind.setter
+    def wind(self, value):
+        self.wind_x = float(value[0])
+        self.wind_y = float(value[1])
+        # direction the wind blows from
+        self.wind_direction = math.atan2(-self.wind_y, -self.wind_x)
+
+    @property
+    def velocity(self):
+        return np.array([self.vx, self.vy])
+
+    @velocity.setter
+    def velocity(self, value):
+        self.vx = float(value[0])
+        self.vy = float(value[1])
+
+    def get_state(self):
+        """Returns the STATE of the boat as a flat array."""
+        return np.array([getattr(self, name) for name in self.STATE])
+
+    def set_state(self, state):
+        for name, value in zip(self.STATE, np.asarray(state, np.float64).tolist()):
+            setattr(self, name, value)
 
     @abstractmethod
-    def command(self, rudder):
-        pass
+    def _drive_params(self):
+        """Returns the sail_coeff, motor_force, polar_table and polar_step of
+        the BoatParams."""
 
-    def _update_state(self, value, delta_value):
-        value += Boat.TIME_STEP * delta_value
-        return value
+    @property
+    def params(self):
+        """The BoatParams of functional.step for this boat."""
+        return BoatParams(
+            self.mass,
+            self.time_step,
+            self.integrator == "implicit",
+            self.MAX_ANGULAR_VELOCITY,
+            self.RUDDER_COEFF,
+            *self._drive_params(),
+        )
+
+    def command(self, rudder, substeps=1):
+        """Advances the boat by substeps physics steps holding the rudder."""
+        # The state is kept in plain floats, NumPy calls on scalars cost more
+        # in dispatch than in arithmetic.
+        rudder = float(rudder)
+        params = self.params
+        state = BoatState(
+            self.x,
+            self.y,
+            self.heading,
+            self.heading_dot,
+            self.vx,
+            self.vy,
+            self.speed,
+            self.wind_x,
+            self.wind_y,
+            self.wind_direction,
+        )
+        for _ in range(substeps):
+            state = step(state, rudder, params, SCALAR_OPS)
+        self.x, self.y, self.heading, self.heading_dot, self.vx, self.vy = state[:6]
+        self.speed = state.speed
+
+        return self.x, self.y, self.heading - np.pi / 2
 
     def reset(self, x, y, heading, heading_dot=0.0, speed=0.0):
-        self.x = x
-        self.y = y
-        self.heading = heading
-        self.heading_dot = heading_dot
-        self.speed = speed
+        self.x = float(x)
+        self.y = float(y)
+        self.heading = float(heading)
+        self.heading_dot = float(heading_dot)
+        self.speed = float(speed)
+
+
+class BoatBatch(ABC):
+    """Structure-of-arrays state for n boats that are stepped together"""
+
+    STATE = Boat.STATE
+    TIME_STEP = Boat.TIME_STEP
+    MAX_ANGULAR_VELOCITY = Boat.MAX_ANGULAR_VELOCITY
+    RUDDER_COEFF = Boat.RUDDER_COEFF
+
+    def __init__(self, n, time_step=TIME_STEP, integrator="euler", dtype=np.float64):
+        assert time_step > 0 and integrator in INTEGRATORS
+        self.time_step = float(time_step)
+        self.integrator = integrator
+        self.n = n
+        self.dtype = np.dtype(dtype)  # of the state, float32 or float64
+        for name in self.STATE:
+            setattr(self, name, np.zeros(n, self.dtype))
+        self.mass = 3000.0  # kg
+        self.set_wind(slice(None), *np.array([0.0, -50.0]) * self.TIME_STEP)
+
+    @abstractmethod
+    def _drive_params(self):
+        """See Boat._drive_params."""
+
+    params = Boat.params
+
+    def reset(self, index, x, y, heading):
+        """Places the selected boats, at rest, like a freshly built Boat."""
+        self.x[index] = x
+        self.y[index] = y
+        self.heading[index] = heading
+        self.heading_dot[index] = 0.0
+        self.vx[index] = 0.0
+        self.vy[index] = 0.0
+        self.speed[index] = 0.0
+
+    def set_wind(self, index, wind_x, wind_y):
+        """Sets the true wind velocity at the selected boats, see Boat.wind."""
+        self.wind_x[index] = wind_x
+        self.wind_y[index] = wind_y
+        self.wind_direction[index] = np.arctan2(
+            -self.wind_y[index], -self.wind_x[index]
+        )
+
+    def get_state(self, index=slice(None)):
+        """Returns the STATE of the selected boats as a (len(STATE), k) array."""
+        return np.stack([getattr(self, name)[index] for name in self.STATE])
+
+    def set_state(self, index, state):
+        for name, values in zip(self.STATE, state):
+            getattr(self, name)[index] = values
+
+    def command(self, rudder, substeps=1):
+        """Vectorized Boat.command, rudder is an array with one entry per boat."""
+        rudder = np.asarray(rudder, self.dtype)
+        params = self.params
+        state = BoatState(
+            self.x,
+            self.y,
+            self.heading,
+            self.heading_dot,
+            self.vx,
+            self.vy,
+            self.speed,
+            self.wind_x,
+            self.wind_y,
+            self.wind_direction,
+        )
+        for _ in range(substeps):
+            state = step(state, rudder, params)
+        self.x, self.y, self.heading, self.heading_dot, self.vx, self.vy = state[:6]
+        self.speed = state.speed
 
-        self.speed = speed
+        return self.x, self.y, self.heading - np.pi / 2
@@ -0,0 +1,123 @@
+"""Proximity and collision queries among many boats, on a uniform grid spatial hash"""
+
+import numpy as np
+
+
+class SpatialHash:
+    """Boats binned into the square cells of a grid over a size x size course.
+
+    Cells are at least cell_size wide, so boats closer than cell_size are in
+    the same or in adjacent cells. Boats off the course are binned in the edge
+    cells. update() re-bins the boats every step: they are kept sorted by cell,
+    and as few of them change cell in a step, the stable sort of the previous
+    order is close to linear. Queries then only look at adjacent cells, O(N)
+    for a fleet of N boats spread over the course.
+    """
+
+    def __init__(self, size, cell_size):
+        self.cells = max(1, int(size // cell_size))  # per side
+        self.cell_size = size / self.cells
+        self.width = self.cells + 2  # with a border of empty cells
+        self.n_cells = self.width**2  # cell n_cells holds the inactive boats
+        # offsets of the cell itself and of its adjacent cells after it, so
+        # each pair of cells is visited once
+        self.offsets = np.array([0, 1, self.width - 1, self.width, self.width + 1])
+        self.order = None
+
+    def update(self, x, y, active=None):
+        """Bins the boats at x, y, leaving out those not active."""
+        self.x = x
+        self.y = y
+        scale = 1.0 / self.cell_size
+        ix = np.clip((x * scale).astype(np.intp), 0, self.cells - 1)
+        iy = np.clip((y * scale).astype(np.intp), 0, self.cells - 1)
+        cell = (iy + 1) * self.width + ix + 1
+        if active is not None:
+            cell[~active] = self.n_cells
+
+        if self.order is None or len(self.order) != len(cell):
+            self.order = np.argsort(cell, kind="stable")
+        else:
+            self.order = self.order[np.argsort(cell[self.order], kind="stable")]
+        self.cell = cell[self.order]  # cell of every sorted position
+        # the sorted positions of cell c are start[c] to start[c + 1]
+        self.start = np.zeros(self.n_cells + 2, np.intp)
+        np.cumsum(np.bincount(cell, minlength=self.n_cells + 1), out=self.start[1:])
+        self.active = int(self.start[self.n_cells])
+
+    def _candidates(self):
+        """Sorted positions (p, q) of the boats in the same or adjacent cells,
+        each pair once."""
+        position = np.arange(self.active)
+        cell = self.cell[: self.active, None] + self.offsets
+        first = self.start[cell]
+        # in its own cell a boat is paired with the ones after it
+        first[:, 0] = position + 1
+        count = (self.start[cell + 1] - first).ravel()
+        p = np.repeat(np.repeat(position, len(self.offsets)), count)
+        q = np.repeat(first.ravel() - (np.cumsum(count) - count), count)
+        q += np.arange(len(q))
+        return p, q
+
+    def pairs(self, radius):
+        """Indices (i, j) and distance of the pairs of active boats closer than
+        radius, each pair once. radius can't be larger than cell_size."""
+        assert radius <= self.cell_size
+        p, q = self._candidates()
+        i = self.order[p]
+        j = self.order[q]
+        dx = self.x[j] - self.x[i]
+        dy = self.y[j] - self.y[i]
+        distance = dx * dx + dy * dy
+        close = distance < radius * radius
+        return i[close], j[close], np.sqrt(distance[close])
+
+    def nearest(self, k, radius):
+        """Indices and distances of the k nearest boats within radius of every
+        boat, closest first, as (n, k) arrays padded with -1 and inf."""
+        i, j, distance = self.pairs(radius)
+        i, j = np.concatenate((i, j)), np.concatenate((j, i))
+        distance = np.concatenate((distance, distance))
+        by_boat = np.lexsort((distance, i))
+        i, j, distance = i[by_boat], j[by_boat], distance[by_boat]
+
+        n = len(self.x)
+        count = np.bincount(i, minlength=n)
+        rank = np.arange(len(i)) - np.repeat(np.cumsum(count) - count, count)
+        keep = rank < k
+        index = np.full((n, k), -1, dtype=np.intp)
+        nearest = np.full((n, k), np.inf)
+        index[i[keep], rank[keep]] = j[keep]
+        nearest[i[keep], rank[keep]] = distance[keep]
+        return index, nearest
+
+
+def hull_radius(length, beam):
+    """Distance between the centers of two hulls beyond which they can't touch."""
+    return float(np.hypot(length, beam))
+
+
+def hulls_overlap(x, y, heading, i, j, length, beam):
+    """Whether the hulls of the pairs of boats (i, j) overlap, the hulls being
+    length x beam rectangles centered on the boats along their heading. A
+    separating axis test on the two axes of each rectangle."""
+    cos = np.cos(heading)
+    sin = np.sin(heading)
+    cos_i, sin_i, cos_j, sin_j = cos[i], sin[i], cos[j], sin[j]
+    dx = x[j] - x[i]
+    dy = y[j] - y[i]
+    half_length = 0.5 * length
+    half_beam = 0.5 * beam
+
+    # cosine and sine of the angle between the two headings
+    c = np.abs(cos_i * cos_j + sin_i * sin_j)
+    s = np.abs(cos_i * sin_j - sin_i * cos_j)
+    # half extents of a hull projected on the axes of the other one
+    along = half_length + half_length * c + half_beam * s
+    across = half_beam + half_length * s + half_beam * c
+    return (
+        (np.abs(dx * cos_i + dy * sin_i) <= along)
+        & (np.abs(dy * cos_i - dx * sin_i) <= across)
+        & (np.abs(dx * cos_j + dy * sin_j) <= along)
+        & (np.abs(dy * cos_j - dx * sin_j) <= across)
+    )
@@ -0,0 +1,178 @@
+"""Functional boat physics, step(state, action, params) -> state
+
+The dynamics of Boat.command as a pure function of named tuples, without
+Python control flow on the state: branches are where masks. The same code
+runs on floats or on arrays of any shape, the array operations are taken from
+an ops namespace: SCALAR_OPS for floats, NUMPY_OPS for NumPy arrays, or
+array_ops(module) for another NumPy-like module.
+"""
+
+import math
+from collections import namedtuple
+from types import SimpleNamespace
+
+import numpy as np
+
+TIME_STEP = 0.1  # seconds, the dynamics are tuned for this step
+
+BoatState = namedtuple(
+    "BoatState",
+    [
+        "x",
+        "y",
+        "heading",
+        "heading_dot",
+        "vx",
+        "vy",
+        "speed",
+        "wind_x",
+        "wind_y",
+        "wind_direction",  # where the wind blows from, atan2(-wind_y, -wind_x)
+    ],
+)
+
+# implicit is a Python bool choosing the integrator, not a value of the state.
+# The forward drive is sail_coeff * polar(angle to the wind) * apparent wind
+# speed + motor_force, polar_table sampling the polar every polar_step
+# radians from -pi.
+BoatParams = namedtuple(
+    "BoatParams",
+    [
+        "mass",
+        "time_step",
+        "implicit",
+        "max_angular_velocity",
+        "rudder_coeff",
+        "sail_coeff",
+        "motor_force",
+        "polar_table",
+        "polar_step",
+    ],
+)
+
+NO_POLAR = np.zeros(2)  # polar table of boats without a sail
+
+
+def array_ops(xp):
+    """Ops namespace of a NumPy-like array module."""
+    return SimpleNamespace(
+        where=xp.where,
+        minimum=xp.minimum,
+        sqrt=xp.sqrt,
+        cos=xp.cos,
+        sin=xp.sin,
+        index=lambda position: position.astype(int),
+        cast_like=lambda value, like: value.astype(like.dtype),
+    )
+
+
+NUMPY_OPS = array_ops(np)
+SCALAR_OPS = SimpleNamespace(
+    where=lambda condition, x, y: x if condition else y,
+    minimum=min,
+    sqrt=math.sqrt,
+    cos=math.cos,
+    sin=math.sin,
+    index=int,
+    cast_like=lambda value, like: value,
+)
+
+
+def polar_coefficient(table, step, angle, ops=NUMPY_OPS):
+    """Linear interpolation of a polar table, see Polar.coefficients."""
+    position = ((angle + math.pi) % (2 * math.pi)) / step
+    i = ops.minimum(ops.index(position), len(table) - 2)
+    low = table[i]
+    # i in the dtype of position, so float32 stays float32
+    return low + (position - ops.cast_like(i, position)) * (table[i + 1] - low)
+
+
+def step(state, action, params, ops=NUMPY_OPS):
+    """Advances a BoatState by one time step with the rudder at action."""
+    x, y, heading, heading_dot, vx, vy, _, wind_x, wind_y, wind_direction = state
+    mass = params.mass
+    h = params.time_step / TIME_STEP
+    damping = 0.97**h
+
+    cos_heading = ops.cos(heading)
+    sin_heading = ops.sin(heading)
+
+    # positive means forward, negative means backward
+    speed = vx * cos_heading + vy * sin_heading
+    sqrtspeed = ops.sqrt(ops.sqrt(vx * vx + vy * vy))
+    sqrtspeed = ops.where(speed > 0, sqrtspeed, -sqrtspeed)
+
+    heading_dot = heading_dot * damping
+    steerable = (-params.max_angular_velocity < heading_dot) & (
+        heading_dot < params.max_angular_velocity
+    )
+    heading_dot = heading_dot + ops.where(
+        steerable, -action * params.rudder_coeff * sqrtspeed * h, 0.0
+    )
+
+    heading = heading + heading_dot * h
+    fcentripetal = heading_dot * mass
+
+    cos_heading = ops.cos(heading)  # new heading
+    sin_heading = ops.sin(heading)
+
+    apparent_wind_x = wind_x - vx
+    apparent_wind_y = wind_y - vy
+    apparent_wind_speed = ops.sqrt(
+        apparent_wind_x * apparent_wind_x + apparent_wind_y * apparent_wind_y
+    )
+    u = polar_coefficient(
+        params.polar_table, params.polar_step, heading - wind_direction, ops
+    )
+    fdrive = u * apparent_wind_speed * params.sail_coeff + params.motor_force
+
+    vforward = vx * cos_heading + vy * sin_heading
+    vforward_x = vforward * cos_heading
+    vforward_y = vforward * sin_heading
+    vperp_x = vx - vforward_x
+    vperp_y = vy - vforward_y
+
+    # opposite to direction of movement
+    vforward_norm = ops.sqrt(vforward_x * vforward_x + vforward_y * vforward_y)
+    vperp_norm = ops.sqrt(vperp_x * vperp_x + vperp_y * vperp_y)
+    velocity_norm = ops.sqrt(vx * vx + vy * vy)
+
+    if params.implicit:
+        # drag and keel evaluated at the end of the step
+        vperp = vy * cos_heading - vx * sin_heading
+        vforward = (vforward + h * fdrive / mass) / (
+            1.0 + h * vforward_norm * 100.0 / mass
+        )
+        vperp = (vperp + h * fcentripetal * velocity_norm / mass) / (
+            1.0 + h * vperp_norm * 1200.0 / mass
+        )
+        vx = vforward * cos_heading - vperp * sin_heading
+        vy = vforward * sin_heading + vperp * cos_heading
+    else:
+        vx = vx + (
+            h
+            * (
+                fdrive * cos_heading
+                - vforward_x * vforward_norm * 100.0  # drag
+                - vperp_x * vperp_norm * 1200.0  # keel
+                - sin_heading * fcentripetal * velocity_norm
+            )
+            / mass
+        )
+        vy = vy + (
+            h
+            * (
+                fdrive * sin_heading
+                - vforward_y * vforward_norm * 100.0  # drag
+                - vperp_y * vperp_norm * 1200.0  # keel
+                + cos_heading * fcentripetal * velocity_norm
+            )
+            / mass
+        )
+
+    x = x + params.time_step * vx
+    y = y + params.time_step * vy
+    speed = ops.sqrt(vx * vx + vy * vy)
+    return BoatState(
+        x, y, heading, heading_dot, vx, vy, speed, wind_x, wind_y, wind_direction
+    )
@@ -0,0 +1,323 @@
+"""Optional numba compiled physics, used when numba is installed"""
+
+import math
+
+import numpy as np
+
+from gym_sailing.physics.boat import Boat
+from gym_sailing.physics.functional import NO_POLAR
+from gym_sailing.physics.motorboat import MotorBoat, MotorBoatBatch
+from gym_sailing.physics.sailboat import SailBoat, SailBoatBatch
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+
+
+def _jit(func):
+    # cache=True stores the compiled kernels on disk (next to this module, or in
+    # NUMBA_CACHE_DIR) so new worker processes skip the compilation.
+    if numba is None:
+        return func
+    return numba.njit(cache=True)(func)
+
+
+@_jit
+def command_kernel(
+    x,
+    y,
+    heading,
+    heading_dot,
+    vx,
+    vy,
+    rudder,
+    substeps,
+    sail,
+    wind_x,
+    wind_y,
+    wind_direction,
+    sailcoeff,
+    motor_force,
+    polar_table,
+    polar_step,
+    mass,
+    time_step,
+    step_scale,
+    implicit,
+    max_angular_velocity,
+    rudder_coeff,
+):
+    """Advances one boat by substeps physics steps of Boat.command with a fixed
+    rudder, step_scale being time_step / Boat.TIME_STEP. The drive force is
+    that of the sail when sail is set, plus motor_force.
+
+    Returns the new (x, y, heading, heading_dot, vx, vy, speed).
+    """
+    h = step_scale
+    damping = 0.97**h
+    for _ in range(substeps):
+        cos_heading = math.cos(heading)
+        sin_heading = math.sin(heading)
+
+        # positive means forward, negative means backward
+        if vx * cos_heading + vy * sin_heading > 0:
+            sqrtspeed = math.sqrt(math.sqrt(vx * vx + vy * vy))
+        else:
+            sqrtspeed = -math.sqrt(math.sqrt(vx * vx + vy * vy))
+
+        heading_dot *= damping
+        if -max_angular_velocity < heading_dot < max_angular_velocity:
+            heading_dot += -rudder * rudder_coeff * sqrtspeed * h
+
+        heading += heading_dot * h
+        fcentripetal = heading_dot * mass
+
+        cos_heading = math.cos(heading)  # new heading
+        sin_heading = math.sin(heading)
+
+        if sail:
+            apparent_wind_x = wind_x - vx
+            apparent_wind_y = wind_y - vy
+            apparent_wind_speed = math.sqrt(
+                apparent_wind_x * apparent_wind_x + apparent_wind_y * apparent_wind_y
+            )
+
+            # Polar.coefficient
+            position = (
+                (heading - wind_direction + math.pi) % (2 * math.pi)
+            ) / polar_step
+            i = min(int(position), polar_table.shape[0] - 2)
+            low = polar_table[i]
+            u = low + (position - i) * (polar_table[i + 1] - low)
+            fdrive = u * apparent_wind_speed * sailcoeff + motor_force
+        else:
+            fdrive = motor_force
+
+        vforward = vx * cos_heading + vy * sin_heading
+        vforward_x = vforward * cos_heading
+        vforward_y = vforward * sin_heading
+        vperp_x = vx - vforward_x
+        vperp_y = vy - vforward_y
+
+        # opposite to direction of movement
+        vforward_norm = math.sqrt(vforward_x * vforward_x + vforward_y * vforward_y)
+        vperp_norm = math.sqrt(vperp_x * vperp_x + vperp_y * vperp_y)
+        velocity_norm = math.sqrt(vx * vx + vy * vy)
+
+        if implicit:
+            # drag and keel evaluated at the end of the step
+            vperp = vy * cos_heading - vx * sin_heading
+            vforward = (vforward + h * fdrive / mass) / (
+                1.0 + h * vforward_norm * 100.0 / mass
+            )
+            vperp = (vperp + h * fcentripetal * velocity_norm / mass) / (
+                1.0 + h * vperp_norm * 1200.0 / mass
+            )
+            vx = vforward * cos_heading - vperp * sin_heading
+            vy = vforward * sin_heading + vperp * cos_heading
+        else:
+            vx += (
+                h
+                * (
+                    fdrive * cos_heading
+                    - vforward_x * vforward_norm * 100.0  # drag
+                    - vperp_x * vperp_norm * 1200.0  # keel
+                    - sin_heading * fcentripetal * velocity_norm
+                )
+                / mass
+            )
+            vy += (
+                h
+                * (
+                    fdrive * sin_heading
+                    - vforward_y * vforward_norm * 100.0  # drag
+                    - vperp_y * vperp_norm * 1200.0  # keel
+                    + cos_heading * fcentripetal * velocity_norm
+                )
+                / mass
+            )
+
+        x += time_step * vx
+        y += time_step * vy
+
+    speed = math.sqrt(vx * vx + vy * vy)
+    return x, y, heading, heading_dot, vx, vy, speed
+
+
+@_jit
+def batch_command_kernel(
+    x,
+    y,
+    heading,
+    heading_dot,
+    vx,
+    vy,
+    speed,
+    rudder,
+    substeps,
+    sail,
+    wind_x,
+    wind_y,
+    wind_direction,
+    sailcoeff,
+    motor_force,
+    polar_table,
+    polar_step,
+    mass,
+    time_step,
+    step_scale,
+    implicit,
+    max_angular_velocity,
+    rudder_coeff,
+):
+    """Advances every boat of a batch in place, see command_kernel, the wind
+    arrays hold one entry per boat."""
+    for i in range(x.shape[0]):
+        (
+            x[i],
+            y[i],
+            heading[i],
+            heading_dot[i],
+            vx[i],
+            vy[i],
+            speed[i],
+        ) = command_kernel(
+            x[i],
+            y[i],
+            heading[i],
+            heading_dot[i],
+            vx[i],
+            vy[i],
+            rudder[i],
+            substeps,
+            sail,
+            wind_x[i],
+            wind_y[i],
+            wind_direction[i],
+            sailcoeff,
+            motor_force,
+            polar_table,
+            polar_step,
+            mass,
+            time_step,
+            step_scale,
+            implicit,
+            max_angular_velocity,
+            rudder_coeff,
+        )
+
+
+class JitBoatMixin:
+    """Replaces Boat.command with command_kernel"""
+
+    SAIL = False
+
+    @property
+    def _polar_table(self):
+        return self.polar.table if self.SAIL else NO_POLAR
+
+    @property
+    def _polar_step(self):
+        return self.polar.step if self.SAIL else 1.0
+
+    @property
+    def _drive_forces(self):
+        # sail_coeff and motor_force, as the Python physics takes them
+        return self._drive_params()[:2]
+
+    @property
+    def _step_args(self):
+        return (
+            self.mass,
+            self.time_step,
+            self.time_step / Boat.TIME_STEP,
+            self.integrator == "implicit",
+            self.MAX_ANGULAR_VELOCITY,
+            self.RUDDER_COEFF,
+        )
+
+    def command(self, rudder, substeps=1):
+        wind_x, wind_y = (self.wind_x, self.wind_y) if self.SAIL else (0.0, 0.0)
+        wind_direction = self.wind_direction if self.SAIL else 0.0
+        (
+            self.x,
+            self.y,
+            self.heading,
+            self.heading_dot,
+            self.vx,
+            self.vy,
+            self.speed,
+        ) = command_kernel(
+            self.x,
+            self.y,
+            self.heading,
+            self.heading_dot,
+            self.vx,
+            self.vy,
+            float(rudder),
+            substeps,
+            self.SAIL,
+            wind_x,
+            wind_y,
+            wind_direction,
+            *self._drive_forces,
+            self._polar_table,
+            self._polar_step,
+            *self._step_args,
+        )
+
+        return self.x, self.y, self.heading - np.pi / 2
+
+
+class JitBoatBatchMixin(JitBoatMixin):
+    """Replaces BoatBatch.command with batch_command_kernel"""
+
+    def command(self, rudder, substeps=1):
+        batch_command_kernel(
+            self.x,
+            self.y,
+            self.heading,
+            self.heading_dot,
+            self.vx,
+            self.vy,
+            self.speed,
+            np.ascontiguousarray(rudder, dtype=np.float64),
+            substeps,
+            self.SAIL,
+            self.wind_x,
+            self.wind_y,
+            self.wind_direction,
+            *self._drive_forces,
+            self._polar_table,
+            self._polar_step,
+            *self._step_args,
+        )
+
+        return self.x, self.y, self.heading - np.pi / 2
+
+
+class JitSailBoat(JitBoatMixin, SailBoat):
+    SAIL = True
+
+
+class JitMotorBoat(JitBoatMixin, MotorBoat):
+    pass
+
+
+class JitSailBoatBatch(JitBoatBatchMixin, SailBoatBatch):
+    SAIL = True
+
+
+class JitMotorBoatBatch(JitBoatBatchMixin, MotorBoatBatch):
+    pass
+
+
+JIT_CLASSES = {
+    SailBoat: JitSailBoat,
+    MotorBoat: JitMotorBoat,
+    SailBoatBatch: JitSailBoatBatch,
+    MotorBoatBatch: JitMotorBoatBatch,
+}
@@ -0,0 +1,95 @@
+"""Sail drive polar, tabulated for fast lookups"""
+
+import math
+
+import numpy as np
+
+from gym_sailing.physics.boat import norm
+
+
+def laser_drive(angle):
+    """The original gym-sailing polar, angle is the heading relative to the wind."""
+    angle = norm(np.asarray(angle, dtype=np.float64))
+    return np.where(
+        np.abs(angle) < np.pi / 6,
+        4 * (angle + np.pi / 6) * (angle - np.pi / 6),
+        np.where(
+            angle < 0,
+            4 * np.cos(angle + np.pi * 2 / 3),
+            4 * np.cos(angle - np.pi * 2 / 3),
+        ),
+    )
+
+
+class Polar:
+    """Drive coefficient of a sail as a function of the angle between the
+    heading and the wind direction, 0 being head to wind.
+
+    The coefficients are resampled on a uniform grid over [-pi, pi] and
+    linearly interpolated, so a lookup is one gather for any number of boats.
+    """
+
+    RESOLUTION = 3600  # 0.1 degrees
+
+    def __init__(self, angles, coefficients, resolution=RESOLUTION):
+        angles = np.asarray(angles, dtype=np.float64)
+        coefficients = np.asarray(coefficients, dtype=np.float64)
+        assert angles.shape == coefficients.shape and angles.ndim == 1
+
+        if angles.min() >= 0 and angles.max() <= np.pi:
+            # only one tack given, the polar is symmetric
+            other_tack = angles > 0
+            angles = np.concatenate((-angles[other_tack], angles))
+            coefficients = np.concatenate((coefficients[other_tack], coefficients))
+        angles = norm(angles)
+
+        order = np.argsort(angles)
+        self.resolution = resolution
+        self.step = 2 * np.pi / resolution
+        self.table = np.interp(
+            np.linspace(-np.pi, np.pi, resolution + 1),
+            angles[order],
+            coefficients[order],
+            period=2 * np.pi,
+        )
+        self._table = self.table.tolist()
+
+    @classmethod
+    def from_function(cls, drive, resolution=RESOLUTION):
+        """Tabulates a vectorized drive(angle) function."""
+        angles = np.linspace(-np.pi, np.pi, resolution + 1)
+        return cls(angles[:-1], drive(angles[:-1]), resolution)
+
+    @classmethod
+    def load(cls, path, degrees=True, resolution=RESOLUTION):
+        """Loads a polar from a .npy file or a CSV file with angle and
+        coefficient columns, header lines are skipped."""
+        if str(path).endswith(".npy"):
+            data = np.load(path)
+        else:
+            data = np.genfromtxt(path, delimiter=",")
+            data = data[~np.isnan(data).any(axis=1)]
+
+        if data.shape[0] == 2 and data.shape[1] != 2:
+            data = data.T
+        angles, coefficients = data[:, 0], data[:, 1]
+        if degrees:
+            angles = np.radians(angles)
+        return cls(angles, coefficients, resolution)
+
+    def coefficient(self, angle):
+        """Drive coefficient for a single float angle, without NumPy calls."""
+        position = ((angle + math.pi) % (2 * math.pi)) / self.step
+        i = min(int(position), self.resolution - 1)
+        low = self._table[i]
+        return low + (position - i) * (self._table[i + 1] - low)
+
+    def coefficients(self, angles):
+        """Drive coefficients for an array of angles."""
+        position = ((angles + np.pi) % (2 * np.pi)) / self.step
+        i = np.minimum(position.astype(np.intp), self.resolution - 1)
+        low = self.table[i]
+        return low + (position - i) * (self.table[i + 1] - low)
+
+
+LASER_POLAR = Polar.from_function(laser_drive)
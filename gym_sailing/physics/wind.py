@@ -0,0 +1,213 @@
+"""Wind fields, the true wind velocity over the course as a function of time"""
+
+import math
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+class WindField(ABC):
+    """Base wind field, a direction is where the wind blows from, pi/2 being
+    north (+y). Positions are in meters and times in seconds from the start of
+    the episode."""
+
+    CONSTANT = False  # a CONSTANT field is only sampled once per episode
+
+    def reset(self, np_random):
+        """Prepares the field of a new episode, random fields draw from np_random."""
+
+    @abstractmethod
+    def sample(self, x, y, t):
+        """Wind velocity (wx, wy) at arrays of positions and times."""
+
+    @abstractmethod
+    def sample_one(self, x, y, t):
+        """Wind velocity at a single float position and time, without NumPy calls."""
+
+
+class ConstantWind(WindField):
+    CONSTANT = True
+
+    def __init__(self, speed=5.0, direction=np.pi / 2):
+        self.speed = speed
+        self.direction = direction
+        self.velocity = (-speed * math.cos(direction), -speed * math.sin(direction))
+
+    def sample(self, x, y, t):
+        shape = np.shape(x)
+        return np.full(shape, self.velocity[0]), np.full(shape, self.velocity[1])
+
+    def sample_one(self, x, y, t):
+        return self.velocity
+
+
+class OscillatingWind(WindField):
+    """Uniform wind whose direction swings by amplitude radians around direction
+    with the given period, the usual shifts of a sea breeze."""
+
+    def __init__(self, speed=5.0, direction=np.pi / 2, amplitude=0.2, period=120.0):
+        self.speed = speed
+        self.direction = direction
+        self.amplitude = amplitude
+        self.period = period
+
+    def sample(self, x, y, t):
+        direction = self.direction + self.amplitude * np.sin(
+            (2 * np.pi / self.period) * np.broadcast_to(t, np.shape(x))
+        )
+        return -self.speed * np.cos(direction), -self.speed * np.sin(direction)
+
+    def sample_one(self, x, y, t):
+        direction = self.direction + self.amplitude * math.sin(
+            2 * math.pi / self.period * t
+        )
+        return -self.speed * math.cos(direction), -self.speed * math.sin(direction)
+
+
+class GustWind(WindField):
+    """Gust puffs drifting downwind over a base field.
+
+    Every puff is a Gaussian patch of stronger wind that grows and fades over
+    its lifetime. The field is precomputed on a grid of spacing meters every
+    frame_interval seconds, in chunks of CHUNK frames generated the first time
+    they are needed. Lookups take the nearest frame and interpolate it
+    bilinearly, four gathers for any number of boats.
+    """
+
+    CHUNK = 32  # frames computed at once
+
+    def __init__(
+        self,
+        base=None,
+        puffs=6,
+        radius=6.0,
+        strength=0.5,
+        lifetime=40.0,
+        drift=0.1,
+        size=50.0,
+        spacing=2.5,
+        frame_interval=1.0,
+    ):
+        self.base = ConstantWind() if base is None else base
+        self.puffs = puffs  # puffs on the course at any time, on average
+        self.radius = radius
+        self.strength = strength  # extra wind at the center, relative to the base
+        self.lifetime = lifetime
+        self.drift = drift  # puff speed relative to the base wind
+        self.size = size
+        self.spacing = spacing
+        self.frame_interval = frame_interval
+
+        self.nodes = int(math.ceil(size / spacing)) + 1
+        grid = np.arange(self.nodes) * spacing
+        self.grid_x, self.grid_y = np.meshgrid(grid, grid)
+        self.chunk_duration = self.CHUNK * frame_interval
+        self.frames = np.zeros((0, self.nodes, self.nodes), dtype=np.complex128)
+        self._flat = self.frames.ravel()
+        self.seed = 0
+
+    def reset(self, np_random):
+        self.base.reset(np_random)
+        self.seed = int(np_random.integers(2**63))
+        self.frames = self.frames[:0]
+        self._flat = self.frames.ravel()
+
+    def _puffs_born(self, chunk):
+        """Puffs born during a chunk, drawn from their own stream so chunks can
+        be generated in any order."""
+        rng = np.random.default_rng([self.seed, chunk])
+        n = rng.poisson(self.puffs * self.chunk_duration / self.lifetime)
+        return (
+            (chunk + rng.random(n)) * self.chunk_duration,
+            rng.uniform(-self.radius, self.size + self.radius, n),
+            rng.uniform(-self.radius, self.size + self.radius, n),
+        )
+
+    def _compute_chunk(self, chunk):
+        times = (chunk * self.CHUNK + np.arange(self.CHUNK)) * self.frame_interval
+        births = range(
+            max(0, chunk - int(math.ceil(self.lifetime / self.chunk_duration))),
+            chunk + 1,
+        )
+        puffs = [self._puffs_born(c) for c in births]
+        born, puff_x, puff_y = (np.concatenate(p) for p in zip(*puffs))
+
+        # (frame, puff) arrays
+        shape = (self.CHUNK, len(born))
+        t = np.broadcast_to(times[:, None], shape)
+        age = (t - born) / self.lifetime
+        envelope = np.where((age >= 0) & (age < 1), np.sin(np.pi * age), 0.0)
+        # puffs drift downwind, passing over (x, y) halfway through their life
+        vx, vy = self.base.sample(
+            np.broadcast_to(puff_x, shape), np.broadcast_to(puff_y, shape), t
+        )
+        drift = self.drift * (age - 0.5) * self.lifetime
+        center_x = puff_x + vx * drift
+        center_y = puff_y + vy * drift
+
+        # the Gaussians are separable, exp(-dx^2) * exp(-dy^2)
+        grid = self.grid_x[0]
+        gauss_x = np.exp(-(((grid - center_x[..., None]) / self.radius) ** 2))
+        gauss_y = np.exp(-(((grid - center_y[..., None]) / self.radius) ** 2))
+        gust = np.einsum("fp,fpy,fpx->fyx", envelope, gauss_y, gauss_x)
+
+        shape = (self.CHUNK, self.nodes, self.nodes)
+        wx, wy = self.base.sample(
+            np.broadcast_to(self.grid_x, shape),
+            np.broadcast_to(self.grid_y, shape),
+            np.broadcast_to(times[:, None, None], shape),
+        )
+        return (wx + 1j * wy) * (1.0 + self.strength * gust)
+
+    def _ensure_frames(self, frame):
+        """Computes the chunks up to the one holding frame."""
+        while len(self.frames) <= frame:
+            chunk = len(self.frames) // self.CHUNK
+            self.frames = np.concatenate((self.frames, self._compute_chunk(chunk)))
+            self._flat = self.frames.ravel()
+
+    def sample(self, x, y, t):
+        n = self.nodes
+        # np.clip has a large call overhead for small batches
+        gx = np.asarray(x) * (1.0 / self.spacing)
+        np.minimum(np.maximum(gx, 0.0, out=gx), n - 1.0, out=gx)
+        gy = np.asarray(y) * (1.0 / self.spacing)
+        np.minimum(np.maximum(gy, 0.0, out=gy), n - 1.0, out=gy)
+        ix = np.minimum(gx.astype(np.intp), n - 2)
+        iy = np.minimum(gy.astype(np.intp), n - 2)
+        it = np.rint(np.multiply(t, 1.0 / self.frame_interval) + np.zeros_like(gx))
+        it = np.maximum(it.astype(np.intp), 0)
+        last = it.max(initial=0)
+        if last >= len(self.frames):
+            self._ensure_frames(int(last))
+        ux = gx - ix
+        uy = gy - iy
+
+        i = (it * n + iy) * n + ix  # (frame, y, x) corner in the flattened frames
+        flat = self._flat
+        low = flat.take(i)
+        low += ux * (flat.take(i + 1) - low)
+        high = flat.take(i + n)
+        high += ux * (flat.take(i + n + 1) - high)
+        low += uy * (high - low)
+        return low.real, low.imag
+
+    def sample_one(self, x, y, t):
+        n = self.nodes
+        gx = min(max(x * (1.0 / self.spacing), 0.0), n - 1.0)
+        gy = min(max(y * (1.0 / self.spacing), 0.0), n - 1.0)
+        ix = min(int(gx), n - 2)
+        iy = min(int(gy), n - 2)
+        it = max(int(round(t * (1.0 / self.frame_interval))), 0)
+        if it >= len(self.frames):
+            self._ensure_frames(it)
+        ux = gx - ix
+        uy = gy - iy
+
+        frame = self.frames[it]
+        low = frame[iy, ix]
+        low += ux * (frame[iy, ix + 1] - low)
+        high = frame[iy + 1, ix]
+        high += ux * (frame[iy + 1, ix + 1] - high)
+        low += uy * (high - low)
+        return low.real, low.imag
@@ -0,0 +1,152 @@
+"""Opt-in timing counters and episode statistics for BoatEnv"""
+
+import math
+import time
+
+import gymnasium as gym
+
+from gym_sailing.physics.boat import norm
+
+# methods of the env swapped for instrumented ones by attach
+METHODS = ("step", "_get_obs", "_get_reward", "_render_frame", "_make_boat")
+
+
+class Instrumentation:
+    """Times the phases of a BoatEnv.
+
+    attach() replaces the hot methods of the env instance, and the command of
+    its boat, with timed wrappers, detach() removes them, so an env without
+    instrumentation runs its plain methods. The "step" phase is the whole
+    BoatEnv.step, the time left after the other phases is its own overhead.
+
+    The wrappers look up the env, its boat and their methods on every call,
+    so copies and pickles of an instrumented env time themselves.
+    """
+
+    PHASES = ("step", "physics", "obs", "reward", "render")
+
+    def __init__(self, env):
+        self.env = env
+        self.calls = dict.fromkeys(self.PHASES, 0)
+        self.time_ns = dict.fromkeys(self.PHASES, 0)
+
+    def attach(self):
+        env = self.env
+        env.step = Timed(self, "step", "step")
+        env._get_obs = Timed(self, "_get_obs", "obs")
+        env._get_reward = Timed(self, "_get_reward", "reward")
+        env._render_frame = Timed(self, "_render_frame", "render")
+        env._make_boat = MakeTimedBoat(self)
+        if env.boat is not None:
+            env.boat.command = Timed(self, "command", "physics", boat=True)
+
+    def detach(self):
+        for name in METHODS:
+            self.env.__dict__.pop(name, None)
+        if self.env.boat is not None:
+            self.env.boat.__dict__.pop("command", None)
+
+    def timings(self):
+        """Calls, total seconds and mean microseconds of every phase."""
+        return {
+            phase: {
+                "calls": self.calls[phase],
+                "total_s": self.time_ns[phase] / 1e9,
+                "mean_us": self.time_ns[phase] / 1e3 / max(self.calls[phase], 1),
+            }
+            for phase in self.PHASES
+        }
+
+    def reset_timings(self):
+        for phase in self.PHASES:
+            self.calls[phase] = 0
+            self.time_ns[phase] = 0
+
+
+class Timed:
+    """The method name of the env, or of its boat, timed as phase."""
+
+    def __init__(self, instrumentation, name, phase, boat=False):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.phase = phase
+        self.boat = boat
+
+    def __call__(self, *args, **kwargs):
+        instrumentation = self.instrumentation
+        owner = instrumentation.env.boat if self.boat else instrumentation.env
+        method = getattr(type(owner), self.name)
+        start = time.perf_counter_ns()
+        result = method(owner, *args, **kwargs)
+        instrumentation.time_ns[self.phase] += time.perf_counter_ns() - start
+        instrumentation.calls[self.phase] += 1
+        return result
+
+
+class MakeTimedBoat:
+    """_make_boat of the env, timing the command of the new boats."""
+
+    def __init__(self, instrumentation):
+        self.instrumentation = instrumentation
+
+    def __call__(self, *args, **kwargs):
+        env = self.instrumentation.env
+        boat = type(env)._make_boat(env, *args, **kwargs)
+        boat.command = Timed(self.instrumentation, "command", "physics", boat=True)
+        return boat
+
+
+class EpisodeStatistics(gym.Wrapper):
+    """Collects the return, length, number of tacks and distance sailed of the
+    episodes of a BoatEnv.
+
+    Apply it outside TimeLimit, so truncated episodes end here too. The
+    statistics are added to the info of the step ending an episode, terminated
+    or truncated, as info["episode"], and passed to on_episode(stats) when an
+    episode ends or is cut short by a reset, to export them.
+    """
+
+    def __init__(self, env, on_episode=None):
+        super().__init__(env)
+        self.on_episode = on_episode
+        self.statistics = None  # of the running episode
+
+    def reset(self, **kwargs):
+        if self.statistics is not None and self.statistics["length"] > 0:
+            self._end_episode()
+        result = self.env.reset(**kwargs)
+        boat = self.env.unwrapped.boat
+        self.statistics = {"return": 0.0, "length": 0, "tacks": 0, "distance": 0.0}
+        self._position = (boat.x, boat.y)
+        self._to_wind = norm(boat.heading - boat.wind_direction)
+        return result
+
+    def step(self, action):
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        if self.statistics is not None:
+            self._record(reward)
+            if terminated or truncated:
+                info["episode"] = self._end_episode()
+        return obs, reward, terminated, truncated, info
+
+    def _record(self, reward):
+        boat = self.env.unwrapped.boat
+        episode = self.statistics
+        episode["return"] += float(reward)
+        episode["length"] += 1
+
+        x, y = self._position
+        episode["distance"] += math.sqrt((boat.x - x) ** 2 + (boat.y - y) ** 2)
+        self._position = (boat.x, boat.y)
+
+        # a tack turns the bow through the wind, a gybe the stern
+        to_wind = norm(boat.heading - boat.wind_direction)
+        if to_wind * self._to_wind < 0 and abs(to_wind) < math.pi / 2:
+            episode["tacks"] += 1
+        self._to_wind = to_wind
+
+    def _end_episode(self):
+        episode, self.statistics = self.statistics, None
+        if self.on_episode is not None:
+            self.on_episode(episode)
+        return episode
@@ -0,0 +1,151 @@
+"""Top-down pixel observations of batches of boats, rasterized with NumPy"""
+
+import math
+
+import numpy as np
+
+# the colors of Renderer, with a red bow to show the heading
+WATER_COLOR = (38, 102, 138)
+BOAT_COLOR = (220, 245, 230)
+BOW_COLOR = (230, 60, 40)
+TARGET_COLOR = (255, 150, 0)
+LAYLINE_COLOR = (102, 160, 198)
+LAYLINE_ANGLE = math.radians(40)  # below the horizontal, as drawn by Renderer
+LUMINANCE = np.array([0.299, 0.587, 0.114])
+
+
+class Rasterizer:
+    """Draws size x size top-down images of the course, north up, for a batch
+    of boats at once into an (n, size, size, channels) uint8 array.
+
+    The water, laylines and target are drawn once into a background that is
+    copied into every image. Each hull is then drawn by testing the pixels of
+    a small window around its boat, all the boats in the same array
+    operations. Hulls are pointed, with a red bow, and at least a pixel wide
+    so they show in small images. grayscale images have one channel, the
+    luminance of the colors.
+    """
+
+    def __init__(
+        self,
+        size,
+        course_size,
+        target,
+        target_radius,
+        boat_length,
+        boat_beam,
+        grayscale=False,
+    ):
+        self.size = size
+        self.scale = size / course_size  # pixels per meter
+        self.grayscale = grayscale
+        self.channels = 1 if grayscale else 3
+        self.half_length = max(0.5 * boat_length * self.scale, 1.0)
+        self.half_beam = max(0.5 * boat_beam * self.scale, 0.75)
+
+        # offsets of the pixels of the window drawn around every boat
+        window = int(math.ceil(2 * self.half_length)) + 2
+        offsets = np.arange(window) - window // 2
+        self.window_rows, self.window_cols = np.meshgrid(
+            offsets, offsets, indexing="ij"
+        )
+        self.boat_color = self._color(BOAT_COLOR)
+        self.bow_color = self._color(BOW_COLOR)
+        self.background = self._draw_background(target, target_radius)
+
+    def _color(self, rgb):
+        rgb = np.array(rgb, dtype=np.float64)
+        if self.grayscale:
+            rgb = rgb[None] @ LUMINANCE
+        return np.round(rgb).astype(np.uint8)
+
+    def _pixel(self, x, y):
+        """Column and row coordinates of course positions, pixel (row, col)
+        covering [row, row + 1) x [col, col + 1)."""
+        return x * self.scale, self.size - y * self.scale
+
+    def _draw_background(self, target, target_radius):
+        centers = np.arange(self.size) + 0.5
+        rows, cols = np.meshgrid(centers, centers, indexing="ij")
+        image = np.empty((self.size, self.size, 3))
+        image[:] = WATER_COLOR
+
+        target_col, target_row = self._pixel(*target)
+        dx = cols - target_col
+        dy = rows - target_row
+        for side in (-1, 1):
+            # laylines run downwind of the target, rows grow southwards
+            cos = side * math.cos(LAYLINE_ANGLE)
+            sin = math.sin(LAYLINE_ANGLE)
+            across = np.abs(dx * sin - dy * cos)
+            alpha = np.where(dx * cos + dy * sin >= 0, np.clip(1 - across, 0, 1), 0)
+            image += alpha[..., None] * (np.array(LAYLINE_COLOR) - image)
+
+        radius = max(target_radius * self.scale, 1.0)
+        image[dx * dx + dy * dy <= radius * radius] = TARGET_COLOR
+        if self.grayscale:
+            image = image @ LUMINANCE[:, None]
+        return np.round(image).astype(np.uint8)
+
+    def draw(self, x, y, heading, out):
+        """Draws the boats at the arrays x, y and heading into out, an
+        (n, size, size, channels) uint8 array or view."""
+        out[:] = self.background
+        col, row = self._pixel(np.asarray(x), np.asarray(y))
+        col = col[:, None, None]
+        row = row[:, None, None]
+        cols = np.floor(col).astype(np.intp) + self.window_cols
+        rows = np.floor(row).astype(np.intp) + self.window_rows
+
+        # pixel centers along the heading and across it, rows grow southwards
+        dx = cols + 0.5 - col
+        dy = rows + 0.5 - row
+        cos = np.cos(heading)[:, None, None]
+        sin = np.sin(heading)[:, None, None]
+        along = dx * cos - dy * sin
+        across = np.abs(dx * sin + dy * cos)
+        # full beam aft, tapering to the bow
+        beam = self.half_beam * np.minimum(
+            1.0, (self.half_length - along) / self.half_length
+        )
+        hull = (np.abs(along) <= self.half_length) & (across <= beam)
+        hull &= (rows >= 0) & (rows < self.size) & (cols >= 0) & (cols < self.size)
+
+        boats = np.broadcast_to(np.arange(len(out))[:, None, None], hull.shape)
+        bow = along[hull] > 0.3 * self.half_length
+        out[boats[hull], rows[hull], cols[hull]] = np.where(
+            bow[:, None], self.bow_color, self.boat_color
+        )
+        return out
+
+
+class PixelObservations:
+    """Images of a batch of n envs drawn by a Rasterizer, with the last
+    frame_stack frames stacked on a new axis after the env one, oldest first,
+    like gymnasium's FrameStackObservation.
+
+    The observations are written into out, or into an array of their own, of
+    shape (n, size, size, channels), or (n, frame_stack, size, size, channels)
+    with a frame stack, which is returned by every observe.
+    """
+
+    def __init__(self, rasterizer, n, frame_stack=1, out=None):
+        assert frame_stack >= 1
+        self.rasterizer = rasterizer
+        self.frame_stack = frame_stack
+        frame = (rasterizer.size, rasterizer.size, rasterizer.channels)
+        self.shape = (n, *frame) if frame_stack == 1 else (n, frame_stack, *frame)
+        self.obs = np.zeros(self.shape, np.uint8) if out is None else out
+        assert self.obs.shape == self.shape and self.obs.dtype == np.uint8
+
+    def observe(self, x, y, heading, restart=None):
+        """Draws the boats as the newest frame. restart, an index of the envs
+        starting an episode, fills their whole stack with the new frame."""
+        obs = self.obs
+        if self.frame_stack == 1:
+            return self.rasterizer.draw(x, y, heading, obs)
+        obs[:, :-1] = obs[:, 1:]
+        newest = self.rasterizer.draw(x, y, heading, obs[:, -1])
+        if restart is not None:
+            obs[restart] = newest[restart, None]
+        return obs
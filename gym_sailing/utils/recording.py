@@ -0,0 +1,271 @@
+"""Trajectory recording to columnar .npy shards, replayed through memory maps"""
+
+import json
+import os
+
+import gymnasium as gym
+import numpy as np
+
+BOAT_COLUMNS = [
+    "x",
+    "y",
+    "heading",
+    "heading_dot",
+    "speed",
+    "rudder",
+    "wind_x",
+    "wind_y",
+]
+EPISODE_DTYPE = np.dtype(
+    [
+        ("start", np.int64),
+        ("length", np.int64),
+        ("key", np.uint64, 2),
+        ("episode", np.uint64),
+    ]
+)
+
+
+class RecordTrajectories(gym.Wrapper):
+    """Streams the episodes of a BoatEnv into fixed-dtype columns, saved as
+    .npy shards in the directory path.
+
+    Each episode is stored as one row per state starting with the reset state,
+    whose action and reward are zero. A row holds the observation, the action
+    that led to it, the reward, terminated, truncated and the boat state. Rows
+    are buffered in memory and a shard is written at the end of the first
+    episode reaching shard_size rows, so episodes never span two shards.
+    """
+
+    def __init__(self, env, path, shard_size=2**18):
+        super().__init__(env)
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.shard_size = shard_size
+
+        columns = {
+            "observation": (env.observation_space.dtype, env.observation_space.shape),
+            "action": (env.action_space.dtype, env.action_space.shape),
+            "reward": (np.float64, ()),
+            "terminated": (np.bool_, ()),
+            "truncated": (np.bool_, ()),
+            **{name: (np.float64, ()) for name in BOAT_COLUMNS},
+        }
+        self.columns = {
+            name: {"dtype": np.dtype(dtype).str, "shape": list(shape)}
+            for name, (dtype, shape) in columns.items()
+        }
+        self.metadata_index = scene(env)
+        self.capacity = 1024
+        self.buffers = {
+            name: np.empty((self.capacity, *shape), dtype)
+            for name, (dtype, shape) in columns.items()
+        }
+        self.rows = 0
+        self.episode_start = None
+        self.episodes = []  # episodes of the shard being buffered
+        self.shards = []  # rows of the written shards
+
+    def reset(self, **kwargs):
+        self._end_episode()
+        obs, info = self.env.reset(**kwargs)
+        base = self.env.unwrapped
+        self.episode_start = self.rows
+        self.episode_id = (*base.reset_key.tolist(), base.episode)
+        self._write(obs, 0, 0.0, False, False)
+        return obs, info
+
+    def step(self, action):
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        self._write(obs, action, reward, terminated, truncated)
+        if terminated or truncated:
+            self._end_episode()
+        return obs, reward, terminated, truncated, info
+
+    def _write(self, obs, action, reward, terminated, truncated):
+        if self.rows == self.capacity:
+            self._grow()
+        i = self.rows
+        buffers = self.buffers
+        buffers["observation"][i] = obs
+        buffers["action"][i] = action
+        buffers["reward"][i] = reward
+        buffers["terminated"][i] = terminated
+        buffers["truncated"][i] = truncated
+        base = self.env.unwrapped
+        boat = base.boat
+        buffers["x"][i] = boat.x
+        buffers["y"][i] = boat.y
+        buffers["heading"][i] = boat.heading
+        buffers["heading_dot"][i] = boat.heading_dot
+        buffers["speed"][i] = boat.speed
+        buffers["rudder"][i] = base.last_action
+        buffers["wind_x"][i] = boat.wind_x
+        buffers["wind_y"][i] = boat.wind_y
+        self.rows += 1
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, buffer in self.buffers.items():
+            grown = np.empty((self.capacity, *buffer.shape[1:]), buffer.dtype)
+            grown[: self.rows] = buffer[: self.rows]
+            self.buffers[name] = grown
+
+    def _end_episode(self):
+        if self.episode_start is None:
+            return
+        key0, key1, episode = self.episode_id
+        length = self.rows - self.episode_start
+        self.episodes.append((self.episode_start, length, (key0, key1), episode))
+        self.episode_start = None
+        if self.rows >= self.shard_size:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered episodes as a new shard and updates the index."""
+        if not self.episodes:
+            return
+        rows = self.rows if self.episode_start is None else self.episode_start
+        shard = len(self.shards)
+        for name, buffer in self.buffers.items():
+            np.save(shard_file(self.path, name, shard), buffer[:rows])
+        np.save(
+            shard_file(self.path, "episodes", shard),
+            np.array(self.episodes, dtype=EPISODE_DTYPE),
+        )
+        self.shards.append(rows)
+        self.episodes = []
+
+        # an unfinished episode moves to the front of the buffers
+        if self.episode_start is not None:
+            for buffer in self.buffers.values():
+                buffer[: self.rows - rows] = buffer[rows : self.rows]
+            self.episode_start = 0
+        self.rows -= rows
+
+        with open(os.path.join(self.path, "index.json"), "w") as f:
+            json.dump(
+                {**self.metadata_index, "columns": self.columns, "shards": self.shards},
+                f,
+                indent=2,
+            )
+
+    def close(self):
+        self._end_episode()
+        self.flush()
+        super().close()
+
+
+def shard_file(path, column, shard):
+    return os.path.join(path, f"{column}-{shard:05d}.npy")
+
+
+class TrajectoryReader:
+    """Reads episodes recorded by RecordTrajectories.
+
+    Shards are memory-mapped the first time they are used and episodes are
+    returned as dicts of read-only views into them, nothing is loaded or copied
+    until the data is accessed. episodes is a structured array with the shard,
+    start row, length, Philox key and episode number of every episode.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "index.json")) as f:
+            self.index = json.load(f)
+        self.columns = list(self.index["columns"])
+        self.shard_rows = self.index["shards"]
+        self._shards = {}
+
+        episodes = [
+            np.load(shard_file(path, "episodes", shard))
+            for shard in range(len(self.shard_rows))
+        ]
+        shards = np.repeat(np.arange(len(episodes)), [len(e) for e in episodes])
+        episodes = np.concatenate(episodes) if episodes else np.empty(0, EPISODE_DTYPE)
+        self.episodes = np.empty(
+            len(episodes), [("shard", np.int64)] + EPISODE_DTYPE.descr
+        )
+        self.episodes["shard"] = shards
+        for name in EPISODE_DTYPE.names:
+            self.episodes[name] = episodes[name]
+
+    def __len__(self):
+        return len(self.episodes)
+
+    def __getitem__(self, i):
+        return self.episode(i)
+
+    def shard(self, shard):
+        """The columns of a shard as a dict of memory-mapped arrays."""
+        if shard not in self._shards:
+            self._shards[shard] = {
+                name: np.load(shard_file(self.path, name, shard), mmap_mode="r")
+                for name in self.columns
+            }
+        return self._shards[shard]
+
+    def episode(self, i):
+        """The rows of episode i, as a dict of views into its shard."""
+        shard, start, length = (
+            int(self.episodes[i][k]) for k in ("shard", "start", "length")
+        )
+        return {
+            name: column[start : start + length]
+            for name, column in self.shard(shard).items()
+        }
+
+    def render(self, i, render_mode="rgb_array", renderer=None):
+        """Renders episode i, yielding the frame of every row in rgb_array mode.
+        Frames are written into the same buffer, copy them to keep them."""
+        return render_episode(self.episode(i), self.index, render_mode, renderer)
+
+
+def scene(env):
+    """The course and boat of env, everything needed to render its episodes
+    besides the rows."""
+    base = env.unwrapped
+    return {
+        "env_id": env.spec.id if env.spec is not None else None,
+        "course_size": base.COURSE_SIZE,
+        "target": list(base.TARGET),
+        "target_rad": base.TARGET_RAD,
+        "boat_length": base.BOAT_LENGTH,
+        "boat_beam": base.BOAT_BEAM,
+        "boat_type": base.BOAT_TYPE,
+        "step_duration": base.substeps * base.time_step,
+        "render_fps": base.metadata["render_fps"],
+    }
+
+
+def render_episode(episode, scene, render_mode="rgb_array", renderer=None):
+    """Renders the rows of an episode, a dict with x, y, heading, rudder and
+    reward columns, yielding the frame of every row in rgb_array mode. Frames
+    are written into the same buffer, copy them to keep them."""
+    if renderer is None:
+        from gym_sailing.utils.renderer import Renderer
+
+        renderer = Renderer(
+            scene["boat_length"],
+            scene["boat_beam"],
+            scene["target_rad"],
+            scene["course_size"],
+        )
+    renderer.reset()
+    for t in range(len(episode["x"])):
+        yield renderer._render_frame(
+            boats=[
+                (
+                    float(episode["x"][t]),
+                    float(episode["y"][t]),
+                    float(episode["heading"][t]) - np.pi / 2,
+                    float(episode["rudder"][t]),
+                    scene["boat_type"],
+                )
+            ],
+            target=scene["target"],
+            stepnum=t,
+            reward=float(episode["reward"][t]),
+            render_mode=render_mode,
+            fps=scene["render_fps"],
+        )
@@ -1,15 +1,117 @@
 import os
+from collections import OrderedDict
+from functools import lru_cache
 
 import numpy as np
 import pygame
 
+ASSETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+
+@lru_cache(maxsize=None)
+def load_image(name, width, height):
+    """Loads and scales an asset once per process, the result is shared and
+    must not be drawn on."""
+    image = pygame.image.load(os.path.join(ASSETS_PATH, name))
+    return pygame.transform.scale(image, (width, height))
+
+
+@lru_cache(maxsize=None)
+def load_font(name, size):
+    pygame.font.init()
+    return pygame.font.SysFont(name, size)
+
+
+def mirror(image, mirrored):
+    """image flipped upside down when mirrored, for drawing in y-up coordinates."""
+    return pygame.transform.flip(image, False, True) if mirrored else image
+
+
+class SpriteAtlas:
+    """Hull and sail sprites rotated (and tinted) at a fixed angular resolution.
+
+    Each sprite is rendered with rotozoom the first time its angle and color
+    are drawn and then reused, so frames are drawn with plain blits. Mirrored
+    sprites are the upside down ones drawn in y-up coordinates. Only the
+    max_sprites last drawn hulls and sails are kept, a fleet of many colors
+    would otherwise cache a sprite for every angle of every color.
+    """
+
+    MAX_SPRITES = 2048  # per cache, about 20 MB of hulls
+
+    def __init__(self, boat_img, sail_img, resolution=1.0, max_sprites=MAX_SPRITES):
+        self.boat_imgs = (boat_img, mirror(boat_img, True))
+        sail_imgs = (sail_img, pygame.transform.flip(sail_img, True, False))
+        self.sail_imgs = (sail_imgs, tuple(mirror(img, True) for img in sail_imgs))
+        self.resolution = resolution
+        self.n_angles = int(round(360 / resolution))
+        self.max_sprites = max_sprites
+        self.hulls = OrderedDict()
+        self.sails = OrderedDict()
+
+    def _angle(self, degrees):
+        return int(round(degrees / self.resolution)) % self.n_angles
+
+    def _cached(self, cache, key):
+        """The sprite of key in cache, marked as the last drawn, or None."""
+        sprite = cache.get(key)
+        if sprite is not None:
+            cache.move_to_end(key)
+        return sprite
+
+    def _store(self, cache, key, sprite):
+        cache[key] = sprite
+        if len(cache) > self.max_sprites:
+            cache.popitem(last=False)
+
+    def hull(self, degrees, color, mirrored=False):
+        key = (self._angle(degrees), color, mirrored)
+        sprite = self._cached(self.hulls, key)
+        if sprite is None:
+            angle = key[0] * self.resolution
+            sprite = pygame.transform.rotozoom(
+                self.boat_imgs[mirrored], -angle if mirrored else angle, 0.05
+            )
+            if color is not None:
+                sprite.fill(color, special_flags=pygame.BLEND_RGB_MULT)
+            self._store(self.hulls, key, sprite)
+        return sprite
+
+    def sail(self, degrees, flipped, mirrored=False):
+        key = (self._angle(degrees), flipped, mirrored)
+        sprite = self._cached(self.sails, key)
+        if sprite is None:
+            angle = key[0] * self.resolution
+            sprite = pygame.transform.rotozoom(
+                self.sail_imgs[mirrored][flipped], -angle if mirrored else angle, 0.05
+            )
+            self._store(self.sails, key, sprite)
+        return sprite
+
+
+@lru_cache(maxsize=None)
+def load_atlas(boat_size, sail_size, resolution):
+    """SpriteAtlas shared by every Renderer of the process with the same sizes."""
+    return SpriteAtlas(
+        load_image("laser.png", *boat_size),
+        load_image("sail.png", *sail_size),
+        resolution,
+    )
+
 
 class Renderer:
+    QUALITIES = ["atlas", "exact"]
+    ATLAS_RESOLUTION = 1.0  # degrees
+    TRAILS = ["first", "all", "none"]
+    TRAIL_LENGTH = 300  # frames
+
     WATER_COLOR = (38, 102, 138)
     BOAT_COLOR = (220, 245, 230)
     TARGET_COLOR = (255, 150, 0)
     INFO_COLOR = (102, 160, 198)
     FONT_SIZE = 20
+    SCREEN_WIDTH = 680
+    DIRTY_MARGIN = 2  # pixels around the dirty rects, for antialiasing
 
     def __init__(
         self,
@@ -17,61 +119,128 @@ class Renderer:
         boat_beam=1.4,
         target_radius=1.3 / 2,
         course_size=60,
+        quality="atlas",
+        trails="first",
+        incremental=None,
     ):
+        assert quality in self.QUALITIES
+        assert trails in self.TRAILS
+        self.quality = quality
+        self.trails = trails
+        # None draws incrementally in human mode only, see _render_frame
+        self.incremental = incremental
         self.boat_length = boat_length
         self.boat_beam = boat_beam
         self.target_rad = 0.3 * target_radius  # TODO: get a better fix for this 0.3
         self.course_size = course_size
 
-        self.screen_width = 680
+        self.screen_width = self.SCREEN_WIDTH
 
         self.scale = self.screen_width / (self.course_size)
         self.screen_height = int(self.scale * (self.course_size))
 
-        pygame.font.init()
-        self.normal_font = pygame.font.SysFont("monospace", 20)
+        self.normal_font = load_font("monospace", 20)
 
         boatwidth = self.boat_beam * self.scale
         boatlength = self.boat_length * self.scale
 
-        path = os.path.dirname(os.path.abspath(__file__))
-
-        self.boat_img = pygame.image.load(os.path.join(path, "assets/laser.png"))
-
-        self.boat_img = pygame.transform.scale(
-            self.boat_img, (boatwidth * 20, boatlength * 20)
-        )
-        self.sail_img = pygame.image.load(os.path.join(path, "assets/sail.png"))
-        self.sail_img = pygame.transform.scale(
-            self.sail_img, (boatwidth * 20, 1.505 * boatlength * 20)
-        )
-        self.trail = []
-
-        self.window = None
+        boat_size = (int(boatwidth * 20), int(boatlength * 20))
+        sail_size = (int(boatwidth * 20), int(1.505 * boatlength * 20))
+        self.boat_img = load_image("laser.png", *boat_size)
+        self.sail_img = load_image("sail.png", *sail_size)
+        self.atlas = None
+        if quality == "atlas":
+            self.atlas = load_atlas(boat_size, sail_size, self.ATLAS_RESOLUTION)
+        # Ring buffer with the last TRAIL_LENGTH positions of every boat
+        self.trail = np.zeros((0, self.TRAIL_LENGTH, 2))
+        self.trail_head = 0
+        self.trail_size = 0
+
+        self.window = None  # the surface everything is drawn on
+        self.display = False
         self.clock = None
-
-    def _render_frame(self, boats, target, stepnum, reward, render_mode, fps):
-        if self.window is None and render_mode in ["human", "rgb_array"]:
-            # FIXME: self.window should be used only in human mode,
-            # in rgb mode there is no need to create a window, only the surface
-            # the surface should be separated from the window
+        self.frame = None
+        self.y_up = False  # drawing straight in y-up screen coordinates
+        self.background = None  # water and target of incremental frames
+        self.background_target = None
+        self.dirty = []  # rects drawn over the background in the last frame
+
+    @classmethod
+    def frame_shape(cls, course_size):
+        """Shape of the rgb_array frames rendered for a course."""
+        scale = cls.SCREEN_WIDTH / course_size
+        return (int(scale * course_size), cls.SCREEN_WIDTH, 3)
+
+    def reset(self):
+        """Starts a new episode, keeping the window and the loaded assets."""
+        self.trail_head = 0
+        self.trail_size = 0
+
+    def _render_frame(self, boats, target, stepnum, reward, render_mode, fps, out=None):
+        """Draws a frame, the whole window by default. An incremental renderer
+        draws in y-up screen coordinates, without flipping the frame, over a
+        cached background of the water and target, and only redraws the dirty
+        rects around the boats, trails and info label, which are the only
+        parts of the display updated in human mode."""
+        if self.window is None:
+            self.y_up = self.incremental or (
+                self.incremental is None and render_mode == "human"
+            )
+        if self.window is None and render_mode == "human":
             pygame.init()
             pygame.display.init()
             self.window = pygame.display.set_mode(
                 (self.screen_width, self.screen_height)
             )
             pygame.display.set_caption("Boat Environment")
+            self.display = True
+
+        elif self.window is None and render_mode == "rgb_array":
+            # Offscreen surface, headless machines need no video driver
+            self.window = pygame.Surface((self.screen_width, self.screen_height))
+            self.frame = np.empty((self.screen_height, self.screen_width, 3), np.uint8)
 
         if self.clock is None and render_mode == "human":
             self.clock = pygame.time.Clock()
 
-        self.draw_water()
-        self.draw_target(target)
+        if self.y_up:
+            updated = self._draw_incremental(boats, target, stepnum, reward)
+        else:
+            self.draw_water()
+            self.draw_target(target)
+            self._draw_boats(boats)
+            self.window.blit(pygame.transform.flip(self.window, False, True), (0, 0))
+            self.draw_info(stepnum, reward)
+            updated = None
 
-        for n, boat in enumerate(boats):
-            if n == 0:  # for the first boat only, draw the trail
-                self.draw_trail(boat)
+        if render_mode == "human":
+            if updated is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(updated)
+            pygame.event.pump()
+
+            # Handle events
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.close()
 
+            self.clock.tick(fps)
+
+        elif render_mode == "rgb_array":
+            # Frames are copied into a reused buffer, out or self.frame, which is
+            # overwritten by the next frame
+            if out is None:
+                out = self.frame
+            pixels = pygame.surfarray.pixels3d(self.window)
+            np.copyto(out, pixels.transpose(1, 0, 2))
+            del pixels  # unlocks the surface
+            return out
+
+    def _draw_boats(self, boats):
+        """Draws the trails and the boats, returning the rects drawn."""
+        rects = self.draw_trails(boats)
+        for n, boat in enumerate(boats):
             boat_heading = boat[2]
             boat_pos = (boat[0], boat[1])
             if len(boat) > 3:
@@ -85,45 +254,71 @@ class Renderer:
             else:
                 boat_type = "sailboat"
 
-            self.draw_boat(
-                boat_pos, boat_heading, rudder, self.boat_color(n), boat_type
+            rects.append(
+                self.draw_boat(
+                    boat_pos, boat_heading, rudder, self.boat_color(n), boat_type
+                )
             )
-
-        self.window.blit(pygame.transform.flip(self.window, False, True), (0, 0))
-        self.draw_info(stepnum, reward)
-
-        if render_mode == "human":
-            pygame.display.flip()
-            pygame.event.pump()
-            pygame.display.update()
-
-            # Handle events
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.close()
-
-            self.clock.tick(fps)
-
-        elif render_mode == "rgb_array":
-            return pygame.surfarray.array3d(self.window).transpose(1, 0, 2)
-
-    def draw_trail(self, boat):
-        self.trail.append((boat[0], boat[1]))
-        if len(self.trail) > 300:
-            self.trail.pop(0)
-        for i in range(len(self.trail) - 1):
-            pygame.draw.aaline(
-                self.window,
-                self.BOAT_COLOR,
-                (
-                    int(self.scale * self.trail[i][0]),
-                    int(self.scale * self.trail[i][1]),
-                ),
-                (
-                    int(self.scale * self.trail[i + 1][0]),
-                    int(self.scale * self.trail[i + 1][1]),
-                ),
+        return rects
+
+    def _draw_incremental(self, boats, target, stepnum, reward):
+        """Draws a frame in y-up coordinates over the background, returning the
+        rects of the window that changed."""
+        target = tuple(target)
+        if self.background is None or target != self.background_target:
+            self.draw_water()
+            self.draw_target(target)
+            self.background = self.window.copy()
+            self.background_target = target
+            self.dirty = [self.window.get_rect()]
+
+        # erase the last frame, then draw the new one
+        restored = [
+            self.window.blit(self.background, rect, rect) for rect in self.dirty
+        ]
+        drawn = self._draw_boats(boats)
+        drawn.append(self.draw_info(stepnum, reward))
+        window = self.window.get_rect()
+        self.dirty = [
+            rect.inflate(2 * self.DIRTY_MARGIN, 2 * self.DIRTY_MARGIN).clip(window)
+            for rect in drawn
+        ]
+        return restored + self.dirty
+
+    def _point(self, x, y):
+        """A point of the y-down drawing, mirrored when drawing in y-up screen
+        coordinates."""
+        if self.y_up:
+            return (x, self.screen_height - 1 - y)
+        return (x, y)
+
+    def draw_trails(self, boats):
+        if self.trails == "none" or len(boats) == 0:
+            return []
+        n_boats = len(boats) if self.trails == "all" else 1
+
+        positions = np.array([(boat[0], boat[1]) for boat in boats[:n_boats]])
+        if self.trail.shape[0] < n_boats:
+            # new boats start with a trail collapsed on their position
+            new_trails = np.repeat(
+                positions[self.trail.shape[0] :, None, :], self.TRAIL_LENGTH, axis=1
             )
+            self.trail = np.concatenate((self.trail, new_trails))
+
+        self.trail[:n_boats, self.trail_head] = positions
+        self.trail_head = (self.trail_head + 1) % self.TRAIL_LENGTH
+        self.trail_size = min(self.trail_size + 1, self.TRAIL_LENGTH)
+        if self.trail_size < 2:
+            return []
+
+        order = np.arange(self.trail_head - self.trail_size, self.trail_head)
+        points = (self.scale * self.trail[:n_boats, order]).astype(int)
+        if self.y_up:
+            points[..., 1] = self.screen_height - 1 - points[..., 1]
+        return [
+            pygame.draw.aalines(self.window, self.boat_color(n), False, points[n])
+            for n in range(n_boats)
+        ]
 
     def boat_color(self, n):
         if n == 0:
@@ -145,7 +340,7 @@ class Renderer:
             True,
             Renderer.INFO_COLOR,
         )
-        self.window.blit(info_label, (7, self.screen_height - 25))
+        return self.window.blit(info_label, (7, self.screen_height - 25))
 
     def draw_boat(
         self, boat_pos, boat_heading, rudder, color=None, boat_type="sailboat"
@@ -156,74 +351,81 @@ class Renderer:
             * self.boat_length
             * self.scale
         )
-        self.draw_hull(boat_pos, boat_heading, color)
+        rect = self.draw_hull(boat_pos, boat_heading, color)
         if boat_type == "sailboat":
-            self.draw_sail(boat_pos, boat_heading, delta)
-        self.draw_rudder(boat_pos, boat_heading, rudder, delta)
+            rect.union_ip(self.draw_sail(boat_pos, boat_heading, delta))
+        rect.union_ip(self.draw_rudder(boat_pos, boat_heading, rudder, delta))
+        return rect
 
     def draw_hull(self, boat_pos, boat_heading, color):
-        boat_img = pygame.transform.rotozoom(
-            self.boat_img, np.degrees(-boat_heading), 0.05
-        )
+        if self.atlas is not None:
+            boat_img = self.atlas.hull(np.degrees(-boat_heading), color, self.y_up)
+        else:
+            boat_img = pygame.transform.rotozoom(
+                mirror(self.boat_img, self.y_up),
+                np.degrees(boat_heading if self.y_up else -boat_heading),
+                0.05,
+            )
+            if color is not None:
+                boat_img.fill(color, special_flags=pygame.BLEND_RGB_MULT)
 
         boat_rect = boat_img.get_rect()
-        boat_rect.center = (
+        boat_rect.center = self._point(
             int(boat_pos[0] * self.scale),
             int(boat_pos[1] * self.scale),
         )
 
-        if color is not None:
-            boat_img.fill(color, special_flags=pygame.BLEND_RGB_MULT)
-
-        self.window.blit(boat_img, boat_rect)
+        return self.window.blit(boat_img, boat_rect)
 
     def draw_sail(self, boat_pos, boat_heading, delta):
         norm_heading = norm(boat_heading)
+        pos = self._point(
+            boat_pos[0] * self.scale + delta[0],
+            boat_pos[1] * self.scale - delta[1],
+        )
         if abs(norm_heading) < 0.5:  # replace by line
-            pygame.draw.aaline(
+            return pygame.draw.aaline(
                 self.window,
                 (0, 0, 0),
-                (
-                    boat_pos[0] * self.scale + delta[0],
-                    boat_pos[1] * self.scale - delta[1],
-                ),
-                (
+                pos,
+                self._point(
                     int((boat_pos[0]) * self.scale),
                     int((boat_pos[1] - self.boat_length * 0.5) * self.scale),
                 ),
             )
 
+        if norm_heading > 0:
+            flipped, angle = 1, np.degrees(-0.45 * (norm_heading + 0.92))
         else:
-            if norm_heading > 0:
-                sail_img = pygame.transform.flip(self.sail_img, True, False)
-                sail_img = pygame.transform.rotozoom(
-                    sail_img, np.degrees(-0.45 * (norm_heading + 0.92)), 0.05
-                )
-
-            else:
-                sail_img = pygame.transform.rotozoom(
-                    self.sail_img.copy(),
-                    np.degrees(-0.45 * (norm_heading - 0.92)),
-                    0.05,
-                )
-
-            pos = (
-                boat_pos[0] * self.scale + delta[0],
-                boat_pos[1] * self.scale - delta[1],
+            flipped, angle = 0, np.degrees(-0.45 * (norm_heading - 0.92))
+
+        if self.atlas is not None:
+            sail_img = self.atlas.sail(angle, flipped, self.y_up)
+        elif flipped:
+            sail_img = pygame.transform.flip(self.sail_img, True, self.y_up)
+            sail_img = pygame.transform.rotozoom(
+                sail_img, -angle if self.y_up else angle, 0.05
+            )
+        else:
+            sail_img = pygame.transform.rotozoom(
+                mirror(self.sail_img, self.y_up).copy(),
+                -angle if self.y_up else angle,
+                0.05,
             )
-            self.window.blit(sail_img, sail_img.get_rect(center=pos))
+
+        return self.window.blit(sail_img, sail_img.get_rect(center=pos))
 
     def draw_rudder(self, boat_pos, boat_heading, rudder, delta):
         rudder_angle = boat_heading - rudder
         rudder_length = 0.4 * self.boat_beam * self.scale
-        pygame.draw.line(
+        return pygame.draw.line(
             self.window,
             (0, 0, 0),
-            (
+            self._point(
                 boat_pos[0] * self.scale - 2 * delta[0],
                 boat_pos[1] * self.scale + 2 * delta[1],
             ),
-            (
+            self._point(
                 boat_pos[0] * self.scale
                 - 2 * delta[0]
                 + rudder_length * np.sin(rudder_angle),
@@ -248,18 +450,19 @@ class Renderer:
             (target[1] - layline_length * np.sin(np.radians(layline_angle))),
         ]
 
+        center = self._point(int(self.scale * target[0]), int(self.scale * target[1]))
         pygame.draw.aaline(
             self.window,
             Renderer.INFO_COLOR,
-            (int(self.scale * target[0]), int(self.scale * target[1])),
-            (int(self.scale * layline1[0]), int(self.scale * layline1[1])),
+            center,
+            self._point(int(self.scale * layline1[0]), int(self.scale * layline1[1])),
         )
 
         pygame.draw.aaline(
             self.window,
             Renderer.INFO_COLOR,
-            (int(self.scale * target[0]), int(self.scale * target[1])),
-            (int(self.scale * layline2[0]), int(self.scale * layline2[1])),
+            center,
+            self._point(int(self.scale * layline2[0]), int(self.scale * layline2[1])),
         )
 
         # Draw the target
@@ -267,12 +470,12 @@ class Renderer:
         pygame.draw.circle(
             self.window,
             Renderer.TARGET_COLOR,
-            (int(self.scale * target[0]), int(self.scale * target[1])),
+            center,
             target_radius,
         )
 
     def close(self):
-        if self.window is not None:
+        if self.display:
             import pygame
 
             pygame.display.quit()
@@ -0,0 +1,116 @@
+"""Offline export of episodes to video files, rendered in a process pool"""
+
+import multiprocessing as mp
+
+import numpy as np
+
+from gym_sailing.utils.recording import TrajectoryReader, render_episode, scene
+
+try:
+    import imageio
+except ImportError:
+    imageio = None
+
+TRACK_COLUMNS = ["x", "y", "heading", "rudder", "reward"]
+
+# per process caches of the workers
+_renderers = {}
+_readers = {}
+
+
+def play_episode(env, policy, seed=None, max_steps=None):
+    """Runs policy(observation) -> action on env for one episode and returns
+    its track, the columns of render_episode, to be rendered later."""
+    obs, _ = env.reset(seed=seed)
+    base = env.unwrapped
+    boat = base.boat
+    rows = [(boat.x, boat.y, boat.heading, 0.0, 0.0)]
+    done = False
+    while not done and (max_steps is None or len(rows) <= max_steps):
+        obs, reward, terminated, truncated, _ = env.step(policy(obs))
+        done = terminated or truncated
+        boat = base.boat
+        rows.append((boat.x, boat.y, boat.heading, float(base.last_action), reward))
+    return dict(zip(TRACK_COLUMNS, np.array(rows, dtype=np.float64).T))
+
+
+def export_videos(
+    episodes, paths, scene, fps=None, frame_step=1, processes=None, context=None
+):
+    """Renders episodes, tracks from play_episode or TrajectoryReader episodes,
+    to the video files paths, .gif or any format of ffmpeg such as .mp4.
+
+    Each worker of a pool of processes renders whole episodes, streaming the
+    frames to the encoder, so no episode is ever held in memory as frames.
+    frame_step renders every frame_step-th row and fps defaults to one frame
+    per frame_step steps of the scene's step_duration, so videos play in real
+    time. processes=1 renders in this process.
+    """
+    assert len(episodes) == len(paths)
+    jobs = [
+        (dict(episode), path, scene, fps, frame_step)
+        for episode, path in zip(episodes, paths)
+    ]
+    _run(jobs, processes, context)
+
+
+def export_recorded(
+    path, episodes, paths, fps=None, frame_step=1, processes=None, context=None
+):
+    """Renders episodes of the recording in path, given by their index, like
+    export_videos. The workers memory-map the recording themselves."""
+    assert len(episodes) == len(paths)
+    index = TrajectoryReader(path).index
+    jobs = [
+        ((path, int(i)), out, index, fps, frame_step) for i, out in zip(episodes, paths)
+    ]
+    _run(jobs, processes, context)
+
+
+def export_policy(env, policy, seeds, paths, max_steps=None, processes=None, **kwargs):
+    """Plays one episode of policy on env for every seed, then renders them with
+    export_videos. Only the tracks are kept while the episodes are played."""
+    tracks = [play_episode(env, policy, seed, max_steps) for seed in seeds]
+    export_videos(tracks, paths, scene(env), processes=processes, **kwargs)
+
+
+def _run(jobs, processes, context):
+    if imageio is None:
+        raise ImportError(
+            "exporting videos needs imageio, install it with "
+            "pip install gym-sailing[video]"
+        )
+    if processes == 1 or len(jobs) <= 1:
+        for job in jobs:
+            _export(job)
+        return
+    with mp.get_context(context).Pool(processes) as pool:
+        for _ in pool.imap_unordered(_export, jobs):
+            pass
+
+
+def _export(job):
+    episode, path, scene, fps, frame_step = job
+    if isinstance(episode, tuple):
+        recording, i = episode
+        if recording not in _readers:
+            _readers[recording] = TrajectoryReader(recording)
+        episode = _readers[recording].episode(i)
+    if frame_step > 1:
+        episode = {name: column[::frame_step] for name, column in episode.items()}
+
+    geometry = tuple(
+        scene[key] for key in ("boat_length", "boat_beam", "target_rad", "course_size")
+    )
+    if geometry not in _renderers:
+        from gym_sailing.utils.renderer import Renderer
+
+        _renderers[geometry] = Renderer(*geometry)
+
+    if fps is None:
+        fps = 1 / (scene["step_duration"] * frame_step)
+    options = {} if str(path).endswith(".gif") else {"macro_block_size": 8}
+    with imageio.get_writer(path, fps=fps, **options) as writer:
+        for frame in render_episode(episode, scene, renderer=_renderers[geometry]):
+            writer.append_data(frame)
+    return path
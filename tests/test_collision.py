@@ -0,0 +1,77 @@
+import math
+
+import numpy as np
+import pytest
+
+from gym_sailing.physics.collision import SpatialHash, hulls_overlap
+
+LENGTH = 4.2
+BEAM = 1.4
+
+
+def brute_force_close(x, y, active, radius):
+    distance = np.hypot(x[:, None] - x, y[:, None] - y)
+    close = (distance < radius) & active[:, None] & active
+    np.fill_diagonal(close, False)
+    return distance, close
+
+
+@pytest.mark.parametrize("n", [1, 2, 50, 500])
+def test_spatial_hash_matches_brute_force(n):
+    rng = np.random.default_rng(n)
+    # boats off the course too, binned in the edge cells
+    x = rng.uniform(-10, 60, n)
+    y = rng.uniform(-10, 60, n)
+    active = rng.random(n) < 0.8
+    grid = SpatialHash(50, 6.0)
+    for _ in range(3):
+        grid.update(x, y, active)
+        distance, close = brute_force_close(x, y, active, 5.0)
+
+        i, j, d = grid.pairs(5.0)
+        pairs = set(map(frozenset, zip(i.tolist(), j.tolist())))
+        assert len(pairs) == len(i)  # each pair once
+        assert pairs == set(map(frozenset, zip(*np.nonzero(close))))
+        np.testing.assert_allclose(d, distance[i, j])
+
+        index, nearest = grid.nearest(3, 5.0)
+        for boat in range(n):
+            others = np.nonzero(close[boat])[0]
+            expected = np.sort(distance[boat, others])[:3]
+            found = index[boat] >= 0
+            assert found.sum() == len(expected)
+            np.testing.assert_allclose(nearest[boat, found], expected)
+            np.testing.assert_allclose(
+                distance[boat, index[boat, found]], nearest[boat, found]
+            )
+            assert np.all(np.isinf(nearest[boat, ~found]))
+
+        # a step of random moves
+        x = x + rng.normal(0, 1, n)
+        y = y + rng.normal(0, 1, n)
+
+
+@pytest.mark.parametrize(
+    "x, y, heading, overlap",
+    [
+        # side by side
+        ((0, 0), (0, 1.3), (0, 0), True),
+        ((0, 0), (0, 1.5), (0, 0), False),
+        # bow to stern
+        ((0, 4.1), (0, 0), (0, 0), True),
+        ((0, 4.3), (0, 0), (0, 0), False),
+        # crossing at a right angle, the bow of one at the side of the other
+        ((0, 0), (0, 2.75), (0, math.pi / 2), True),
+        ((0, 0), (0, 2.85), (0, math.pi / 2), False),
+        # at 45 degrees, only separated across the second hull
+        ((0, -1.77), (0, 1.77), (0, math.pi / 4), True),
+        ((0, -1.98), (0, 1.98), (0, math.pi / 4), False),
+    ],
+)
+def test_hulls_overlap(x, y, heading, overlap):
+    x, y, heading = np.array(x), np.array(y), np.array(heading)
+    for i, j in ((0, 1), (1, 0)):
+        result = hulls_overlap(
+            x, y, heading, np.array([i]), np.array([j]), LENGTH, BEAM
+        )
+        assert result.tolist() == [overlap]
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from gym_sailing.physics.jit import (
+    JitMotorBoat,
+    JitMotorBoatBatch,
+    JitSailBoat,
+    JitSailBoatBatch,
+)
+from gym_sailing.physics.motorboat import MotorBoat, MotorBoatBatch
+from gym_sailing.physics.sailboat import SailBoat, SailBoatBatch
+
+STRONG_MOTOR = 250.0
+
+
+class StrongMotorBoat(MotorBoat):
+    MOTOR_FORCE = STRONG_MOTOR
+
+
+class JitStrongMotorBoat(JitMotorBoat):
+    MOTOR_FORCE = STRONG_MOTOR
+
+
+class StrongMotorBoatBatch(MotorBoatBatch):
+    MOTOR_FORCE = STRONG_MOTOR
+
+
+class JitStrongMotorBoatBatch(JitMotorBoatBatch):
+    MOTOR_FORCE = STRONG_MOTOR
+
+
+def rudders(steps, n=None):
+    return np.random.default_rng(0).uniform(-1, 1, (steps, n or 1))
+
+
+@pytest.mark.parametrize(
+    "python_class, jit_class",
+    [
+        (SailBoat, JitSailBoat),
+        (MotorBoat, JitMotorBoat),
+        (StrongMotorBoat, JitStrongMotorBoat),
+    ],
+)
+@pytest.mark.parametrize("integrator", ["euler", "implicit"])
+def test_jit_boat_matches_python(python_class, jit_class, integrator):
+    boats = [
+        cls(x=25.0, y=5.0, heading=1.0, integrator=integrator)
+        for cls in (python_class, jit_class)
+    ]
+    for rudder in rudders(200):
+        for boat in boats:
+            boat.command(rudder[0], substeps=2)
+        np.testing.assert_allclose(
+            boats[1].get_state(), boats[0].get_state(), rtol=1e-9, atol=1e-12
+        )
+
+
+@pytest.mark.parametrize(
+    "python_class, jit_class",
+    [
+        (SailBoatBatch, JitSailBoatBatch),
+        (MotorBoatBatch, JitMotorBoatBatch),
+        (StrongMotorBoatBatch, JitStrongMotorBoatBatch),
+    ],
+)
+def test_jit_batch_matches_python(python_class, jit_class):
+    n = 8
+    rng = np.random.default_rng(1)
+    x, y, heading = rng.uniform(5, 45, n), rng.uniform(5, 45, n), rng.uniform(-3, 3, n)
+    batches = [cls(n) for cls in (python_class, jit_class)]
+    for batch in batches:
+        batch.reset(slice(None), x, y, heading)
+    for rudder in rudders(200, n):
+        for batch in batches:
+            batch.command(rudder)
+        np.testing.assert_allclose(
+            batches[1].get_state(), batches[0].get_state(), rtol=1e-9, atol=1e-12
+        )
+
+
+def test_motor_force_drives_the_jit_boat():
+    boats = [
+        cls(x=25.0, y=5.0, heading=1.0) for cls in (JitMotorBoat, JitStrongMotorBoat)
+    ]
+    for _ in range(50):
+        for boat in boats:
+            boat.command(0.0)
+    assert boats[1].speed > boats[0].speed
@@ -0,0 +1,109 @@
+import gymnasium as gym
+import numpy as np
+import pytest
+
+import gym_sailing  # noqa: F401
+
+ENV_IDS = ["Sailboat-v0", "SailboatDiscrete-v0", "Motorboat-v0"]
+MAX_EPISODE_STEPS = 60
+
+
+def random_actions(space, steps, seed=0):
+    space.seed(seed)
+    return [space.sample() for _ in range(steps)]
+
+
+@pytest.mark.parametrize("env_id", ENV_IDS)
+def test_vector_env_matches_scalar_envs(env_id):
+    num_envs = 4
+    vector_env = gym.make_vec(
+        env_id,
+        num_envs=num_envs,
+        vectorization_mode="vector_entry_point",
+        max_episode_steps=MAX_EPISODE_STEPS,
+    )
+    sync_env = gym.vector.SyncVectorEnv(
+        [
+            lambda: gym.make(env_id, max_episode_steps=MAX_EPISODE_STEPS)
+            for _ in range(num_envs)
+        ]
+    )
+    assert vector_env.single_observation_space == sync_env.single_observation_space
+    assert vector_env.single_action_space == sync_env.single_action_space
+
+    observations, _ = vector_env.reset(seed=7)
+    expected, _ = sync_env.reset(seed=7)
+    np.testing.assert_array_equal(observations, expected)
+
+    dones = 0
+    # long enough for every sub-environment to autoreset a few times
+    for actions in random_actions(vector_env.action_space, 3 * MAX_EPISODE_STEPS):
+        observations, rewards, terminated, truncated, _ = vector_env.step(actions)
+        expected, expected_rewards, expected_terminated, expected_truncated, _ = (
+            sync_env.step(actions)
+        )
+        # the batched physics rounds differently, equal to the last digits
+        np.testing.assert_allclose(observations, expected, rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(rewards, expected_rewards, rtol=1e-9, atol=1e-9)
+        np.testing.assert_array_equal(terminated, expected_terminated)
+        np.testing.assert_array_equal(truncated, expected_truncated)
+        dones += np.sum(terminated | truncated)
+    assert dones >= 2 * num_envs
+    vector_env.close()
+    sync_env.close()
+
+
+def play(env, actions):
+    """Observations and rewards of the steps of actions, stopping at the end
+    of the episode."""
+    observations, rewards = [], []
+    for action in actions:
+        observation, reward, terminated, truncated, _ = env.step(action)
+        observations.append(observation)
+        rewards.append(reward)
+        if terminated or truncated:
+            break
+    return np.array(observations), np.array(rewards)
+
+
+@pytest.mark.parametrize("env_id", ENV_IDS)
+def test_episode_replays_exactly(env_id):
+    env = gym.make(env_id, max_episode_steps=MAX_EPISODE_STEPS)
+    actions = random_actions(env.action_space, MAX_EPISODE_STEPS)
+    env.reset(seed=3)
+    for _ in range(4):
+        play(env, actions)
+        env.reset()
+    first, _ = env.reset()  # episode 5 since the seeded reset
+    observations, rewards = play(env, actions)
+
+    replay = gym.make(env_id, max_episode_steps=MAX_EPISODE_STEPS)
+    replay_first, _ = replay.reset(seed=3, options={"episode": 5})
+    np.testing.assert_array_equal(replay_first, first)
+    replay_observations, replay_rewards = play(replay, actions)
+    np.testing.assert_array_equal(replay_observations, observations)
+    np.testing.assert_array_equal(replay_rewards, rewards)
+
+
+@pytest.mark.parametrize("env_id", ENV_IDS)
+def test_get_state_set_state_round_trip(env_id):
+    env = gym.make(env_id).unwrapped
+    actions = random_actions(env.action_space, 40)
+    env.reset(seed=11)
+    for action in actions[:20]:
+        observation, *_ = env.step(action)
+    state = env.get_state()
+    observations, rewards = play(env, actions[20:])
+    after = env.get_state()
+
+    other = gym.make(env_id).unwrapped
+    other.reset(seed=99)
+    np.testing.assert_array_equal(other.set_state(state), observation)
+    np.testing.assert_array_equal(other.get_state(), state)
+    replay_observations, replay_rewards = play(other, actions[20:])
+    np.testing.assert_array_equal(replay_observations, observations)
+    np.testing.assert_array_equal(replay_rewards, rewards)
+    np.testing.assert_array_equal(other.get_state(), after)
+
+    # the episode stream is restored too, the next episodes are the same
+    np.testing.assert_array_equal(other.reset()[0], env.reset()[0])
@@ -0,0 +1,28 @@
+import gymnasium as gym
+import numpy as np
+import pytest
+
+import gym_sailing  # noqa: F401
+from gym_sailing.utils.video import export_policy
+
+imageio = pytest.importorskip("imageio")
+pytest.importorskip("imageio_ffmpeg")
+
+
+@pytest.mark.parametrize(
+    "substeps, frame_step, fps", [(1, 1, 10), (1, 2, 5), (4, 1, 2.5)]
+)
+def test_default_fps_is_real_time(tmp_path, substeps, frame_step, fps):
+    env = gym.make("Sailboat-v0", substeps=substeps, max_episode_steps=20)
+    path = str(tmp_path / "episode.mp4")
+    export_policy(
+        env,
+        lambda obs: np.array([0.2]),
+        [0],
+        [path],
+        frame_step=frame_step,
+        processes=1,
+    )
+    with imageio.get_reader(path) as reader:
+        assert reader.get_meta_data()["fps"] == pytest.approx(fps)
+        assert reader.count_frames() == len(range(0, 21, frame_step))